@@ -0,0 +1,57 @@
+"""
+Compares what one save and one load cost with the binary games.game_state
+column against storing the handlers' dict as JSON.
+
+Both sides start from the dict the handlers work with, so the binary side pays
+for GameState.from_dict/to_dict and base64 as well. Sizes are shown for the old
+JSON with full question text, the same dict with CRC question keys, and the
+stored base64 payload.
+
+Run from backend-api/:  python -m benchmarks.bench_game_state
+"""
+import json
+import random
+import timeit
+
+from game_state import GameState, dump_game_data, load_game_row
+
+def build_legacy_game(n_players: int, n_used: int) -> dict:
+    """A mid-game document in the JSON shape the bot used to store."""
+    with open('data/truth.json', 'r', encoding='utf-8') as f:
+        truths = json.load(f)
+    with open('data/dare.json', 'r', encoding='utf-8') as f:
+        dares = json.load(f)
+    players = [random.randint(10**8, 10**10) for _ in range(n_players)]
+    return {
+        "_id": -1001234567890, "game_id": "2610191200-123", "game_name": "Cosmic Quest #4321",
+        "admin_id": players[0], "chat_title": "Friday Night Games",
+        "players": players,
+        "scores": {str(p): random.randint(-30, 60) for p in players},
+        "player_stats": {str(p): {"truths": 3, "dares": 2, "skips": 1, "changes": 1} for p in players},
+        "player_queue": players[::-1], "current_player": players[1], "current_choice": "dare",
+        "used_questions": {"truth": truths[:n_used], "dare": dares[:min(n_used, len(dares))]},
+        "start_time": "2026-10-19 12:00:00", "status": "playing",
+    }
+
+def run(number: int = 2000):
+    print(f"{'players':>8} {'text json B':>12} {'key json B':>11} {'stored B':>9} "
+          f"{'json save us':>13} {'bin save us':>12} {'json load us':>13} {'bin load us':>12}")
+    for n_players, n_used in ((2, 5), (8, 30), (20, 60), (100, 60)):
+        legacy = build_legacy_game(n_players, n_used)
+        game = GameState.from_dict(legacy).to_dict() # Handler dict, with question keys
+        json_payload = json.dumps(game)
+        row = {"game_state": dump_game_data(game)}
+        assert load_game_row(row) == game
+
+        timings = [
+            timeit.timeit(lambda: json.dumps(game), number=number),
+            timeit.timeit(lambda: dump_game_data(game), number=number),
+            timeit.timeit(lambda: json.loads(json_payload), number=number),
+            timeit.timeit(lambda: load_game_row(row), number=number),
+        ]
+        json_save, bin_save, json_load, bin_load = (t / number * 1e6 for t in timings)
+        print(f"{n_players:>8} {len(json.dumps(legacy)):>12} {len(json_payload):>11} {len(row['game_state']):>9} "
+              f"{json_save:>13.1f} {bin_save:>12.1f} {json_load:>13.1f} {bin_load:>12.1f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,242 @@
+"""
+Micro-benchmarks for the bot's hot paths, with a stored baseline as a regression gate.
+
+Run from backend-api/:
+    python -m benchmarks.run                    # compare against benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline    # record a new baseline
+    python -m benchmarks.run --filter escape    # only cases whose name contains "escape"
+
+Each case is timed against a fixed pure-Python calibration loop run in the same
+process, and the baseline stores that relative cost rather than seconds, so it
+carries over between machines of different speeds.
+
+Exits with status 1 when any case is slower than its baseline by more than
+--tolerance, or, unless --allow-skipped is given, when a case could not run
+(e.g. a missing dependency) or has no baseline to compare against.
+"""
+import os
+import sys
+import json
+import random
+import string
+import asyncio
+import argparse
+import timeit
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+
+CASES = {}
+
+def case(name: str):
+    """Registers a setup function returning the zero-argument callable to time."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+# --- Question Sampling ---
+
+def _synthetic_bank(size: int):
+    from questions import QuestionBank
+    rng = random.Random(size)
+    questions = [f"Question {i}: " + "".join(rng.choices(string.ascii_lowercase + " ", k=40)) for i in range(size)]
+    return QuestionBank(1, questions, questions[: max(1, size // 4)])
+
+def _sampling_case(size: int, weighted: bool):
+    def setup():
+        from questions import TruthDareGame
+        from question_feedback import QuestionFeedback
+        game = TruthDareGame()
+        bank = _synthetic_bank(size)
+        if weighted:
+            game._snapshots[bank.version] = bank
+            game.rebuild_samplers(QuestionFeedback().weight)
+        used = list(bank.truth_keys[:20])
+        return lambda: game.get_random_question("truth", list(used), bank)
+    return setup
+
+for _size in (100, 10_000, 1_000_000):
+    case(f"get_random_question[uniform,{_size}]")(_sampling_case(_size, weighted=False))
+    case(f"get_random_question[weighted,{_size}]")(_sampling_case(_size, weighted=True))
+
+# --- Markdown Escaping ---
+
+REALISTIC_NAMES = [
+    "alex_99", "Maria.Garcia", "🔥Dragon_Slayer🔥", "john-doe", "(ghost)", "Zoë", "nick.name!",
+    "Player_123456789", "*star*", "__init__", "O'Brien", "李小龙", "a+b=c", "[admin]", "user#42",
+]
+
+@case("escape_markdown_v2[15 names]")
+def _escape_names():
+    from messages import escape_markdown_v2
+    return lambda: [escape_markdown_v2(name) for name in REALISTIC_NAMES]
+
+# --- Scoreboard Assembly ---
+
+def _ranked_players(count: int) -> list:
+    rng = random.Random(count)
+    players = [(10**9 + i, rng.choice(REALISTIC_NAMES), rng.randint(-30, 80)) for i in range(count)]
+    return sorted(players, key=lambda p: p[2], reverse=True)
+
+def _scoreboard_case(count: int):
+    def setup():
+        import messages
+        ranked = [(name, score) for _, name, score in _ranked_players(count)]
+        return lambda: messages.format_scoreboard(ranked)
+    return setup
+
+def _final_results_case(count: int):
+    def setup():
+        import messages
+        ranked = _ranked_players(count)
+        return lambda: messages.format_final_results("Cosmic Quest #4321", ranked)
+    return setup
+
+for _count in (2, 50, 500):
+    case(f"format_scoreboard[{_count} players]")(_scoreboard_case(_count))
+    case(f"format_final_results[{_count} players]")(_final_results_case(_count))
+
+# --- Game State Serialization ---
+
+# Each save and load pays for the dict conversion and base64 too, so those are timed, not bare encode/decode.
+
+@case("game_state.dump_game_data[20 players]")
+def _dump_game():
+    from game_state import GameState, dump_game_data
+    from benchmarks.bench_game_state import build_legacy_game
+    game = GameState.from_dict(build_legacy_game(20, 60)).to_dict()
+    return lambda: dump_game_data(game)
+
+@case("game_state.load_game_row[20 players]")
+def _load_game():
+    from game_state import GameState, dump_game_data, load_game_row
+    from benchmarks.bench_game_state import build_legacy_game
+    row = {"game_state": dump_game_data(GameState.from_dict(build_legacy_game(20, 60)).to_dict())}
+    return lambda: load_game_row(row)
+
+# --- Stats API Leaderboard ---
+
+class InMemoryCollection:
+    """Just enough of a pymongo collection for the stats endpoints: find_one and find by _id."""
+    def __init__(self, docs: list):
+        self._docs = {doc["_id"]: doc for doc in docs}
+
+    def find_one(self, query: dict):
+        return self._docs.get(query["_id"])
+
+    def find(self, query: dict, projection: dict = None):
+        ids = query["_id"]["$in"]
+        return (self._docs[i] for i in ids if i in self._docs)
+
+def _leaderboard_case(count: int):
+    def setup():
+        os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017") # The client connects lazily
+        os.environ.setdefault("SUPABASE_URL", "http://localhost:54321") # As does the Supabase client
+        os.environ.setdefault("SUPABASE_KEY", "benchmark")
+        import main
+        rng = random.Random(count)
+        player_ids = [10**9 + i for i in range(count)]
+        main.groups_collection = InMemoryCollection([{
+            "_id": -100, "title": "Friday Night Games", "total_games": 120,
+            "all_players": [str(pid) for pid in player_ids], "game_history": [],
+        }])
+        main.users_collection = InMemoryCollection([{
+            "_id": pid, "first_name": rng.choice(REALISTIC_NAMES), "username": f"user{pid}",
+            "total_score": rng.randint(0, 5000), "total_truths": rng.randint(0, 200), "total_dares": rng.randint(0, 200),
+        } for pid in player_ids])
+        loop = asyncio.new_event_loop()
+        return lambda: loop.run_until_complete(main.get_group_stats(-100))
+    return setup
+
+for _count in (10, 500, 5000):
+    case(f"get_group_stats[{_count} players]")(_leaderboard_case(_count))
+
+# --- Runner ---
+
+def _calibration_loop():
+    """Dict, string and list work in roughly the mix the cases do."""
+    counts = {}
+    for i in range(500):
+        key = str(i % 37)
+        counts[key] = counts.get(key, 0) + len(key)
+    return sorted(counts.items())
+
+def measure(fn, repeat: int = 7) -> tuple:
+    """
+    Returns the best per-call time in seconds of `fn` and of the calibration loop.
+    The two are timed in alternating rounds, so both see the same CPU clock and load.
+    """
+    timers = [timeit.Timer(fn), timeit.Timer(_calibration_loop)]
+    numbers = [timer.autorange()[0] for timer in timers]
+    best = [float("inf"), float("inf")]
+    for _ in range(repeat):
+        for i, timer in enumerate(timers):
+            best[i] = min(best[i], timer.timeit(numbers[i]) / numbers[i])
+    return best[0], best[1]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against or write")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--allow-skipped", action="store_true", help="do not fail when a case cannot run")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results, regressions, skipped = {}, [], []
+    for name, setup in CASES.items():
+        if args.filter not in name:
+            continue
+        try:
+            fn = setup()
+        except ImportError as e:
+            print(f"{name:<45} skipped ({e})")
+            skipped.append(name)
+            continue
+        seconds, unit = measure(fn)
+        if name in baseline and seconds / unit > baseline[name] * (1 + args.tolerance):
+            # Confirm before reporting, so one noisy sample does not fail the gate.
+            seconds, unit = min((seconds, unit), measure(fn), key=lambda m: m[0] / m[1])
+        results[name] = seconds / unit
+        line = f"{name:<45} {seconds * 1e6:>12.2f} us {results[name]:>12.3f} x"
+        if name in baseline:
+            change = results[name] / baseline[name] - 1
+            line += f"  {change:+7.1%} vs baseline"
+            if change > args.tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        elif not args.save_baseline:
+            line += "  (no baseline)"
+            skipped.append(name)
+        print(line)
+
+    if skipped and not args.allow_skipped:
+        print(f"{len(skipped)} case(s) could not run or have no baseline: {', '.join(skipped)} "
+              f"(pass --allow-skipped to ignore)")
+        return 1
+
+    if args.save_baseline:
+        merged = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                merged = {name: value for name, value in json.load(f).items() if name in CASES}
+        merged.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved {len(results)} result(s) to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+def make_callback_data(action: str, game_id: str, turn: int = None) -> str:
+    """Builds button data scoped to a game and, for turn buttons, to a turn nonce."""
+    return f"{action}:{game_id}" if turn is None else f"{action}:{game_id}:{turn}"
+
+def parse_callback_data(data: str) -> tuple:
+    """Splits button data into (action, game_id, turn); missing parts come back as None."""
+    action, _, scope = data.partition(":")
+    game_id, _, turn = scope.partition(":")
+    return action, game_id or None, int(turn) if turn.isdigit() else None
+
+class CallbackGuard:
+    """
+    Answers stale and duplicate button presses from memory, before any database read.
+
+    The bot records the live turn nonce of each chat whenever it renders buttons.
+    A press is accepted at most once: claiming a turn consumes it, so a double tap
+    (which arrives as a second, distinct callback query) finds it already taken.
+    Chats the guard has not seen since a restart are reported as unknown, and the
+    handlers then fall back to checking the stored game. Ended games leave a
+    tombstone, so their leftover buttons are still answered from memory.
+    """
+    _CONSUMED = -1
+    _ENDED = -2
+
+    def __init__(self, max_seen: int = 10000):
+        self.max_seen = max_seen
+        self._seen = OrderedDict()
+        self._turns = {}  # chat_id -> (game_id, turn)
+
+    def seen(self, key: str) -> bool:
+        """Records `key` (e.g. a callback query ID) and reports whether it was already recorded."""
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            return True
+        self._seen[key] = None
+        if len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+        return False
+
+    def was_seen(self, key: str) -> bool:
+        """Reports whether `key` was recorded, without recording it."""
+        return key in self._seen
+
+    def set_turn(self, chat_id: int, game_id: str, turn: int):
+        self._turns[chat_id] = (game_id, turn)
+
+    def end_game(self, chat_id: int, game_id: str):
+        """Marks a chat's game as over; every button of it is stale from now on."""
+        self._turns[chat_id] = (game_id, self._ENDED)
+
+    def is_stale_game(self, chat_id: int, game_id: str) -> bool:
+        known = self._turns.get(chat_id)
+        return game_id is None or (known is not None and (known[0] != game_id or known[1] == self._ENDED))
+
+    def is_stale(self, chat_id: int, game_id: str, turn: int) -> bool:
+        known = self._turns.get(chat_id)
+        return turn is None or game_id is None or (known is not None and known != (game_id, turn))
+
+    def claim(self, chat_id: int, game_id: str, turn: int) -> bool:
+        """Consumes the turn if it is still live; only the first claim succeeds."""
+        if self.is_stale(chat_id, game_id, turn):
+            return False
+        self._turns[chat_id] = (game_id, self._CONSUMED)
+        return True
+
+    def release(self, chat_id: int, game_id: str, turn: int) -> bool:
+        """Hands back a claimed turn whose handling failed, unless a newer turn was set since."""
+        if self._turns.get(chat_id) != (game_id, self._CONSUMED):
+            return False
+        self._turns[chat_id] = (game_id, turn)
+        return True
@@ -2,9 +2,12 @@ import os
 import json
 from supabase import create_client, Client
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
+from game_state import load_game_row, dump_game_data
+from profile_writes import ProfileWriteBuffer
+
 # Load environment variables
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -33,46 +36,118 @@ class Database:
             logger.critical(f"❌ Could not connect to Supabase: {e}")
             raise ConnectionError(f"Supabase connection failed: {e}") from e
 
+        self.profiles = ProfileWriteBuffer()
+
     # --- Game Management ---
 
     def get_game(self, chat_id: int):
         """Fetches the current game state for a chat."""
-        response = self.supabase.table('games').select('game_data').eq('id', chat_id).single().execute()
-        return response.data.get('game_data') if response.data else None
+        response = self.supabase.table('games').select('game_state, game_data').eq('id', chat_id).maybe_single().execute()
+        return load_game_row(response.data) if response and response.data else None
 
-    def create_game(self, chat_id: int, game_data: dict):
-        """Creates or updates a new game document in the database."""
-        # Use upsert to handle both creation and updates seamlessly
-        return self.supabase.table('games').upsert({
+    def create_game(self, chat_id: int, game_data: dict, touch: bool = True):
+        """
+        Creates or updates a new game document in the database.
+        Player-driven writes stamp last_activity; timer-driven ones pass touch=False
+        so an abandoned game still ages out for the expiry sweeper.
+        """
+        game_data["_id"] = chat_id
+        row = {
             'id': chat_id,
-            'game_data': json.dumps(game_data) # Supabase client expects JSON as a string
-        }).execute()
+            'game_state': dump_game_data(game_data),
+            'game_data': None, # Superseded by game_state
+        }
+        if touch:
+            row['last_activity'] = datetime.now().isoformat()
+        # Use upsert to handle both creation and updates seamlessly
+        return self.supabase.table('games').upsert(row).execute()
 
-    def update_game(self, chat_id: int, updates: dict):
+    def update_game(self, chat_id: int, updates: dict, touch: bool = True):
         """Updates an active game's state by fetching, updating, and saving."""
         current_game_data = self.get_game(chat_id)
         if current_game_data:
             current_game_data.update(updates)
-            return self.create_game(chat_id, current_game_data) # Use upsert to update
+            return self.create_game(chat_id, current_game_data, touch=touch) # Use upsert to update
+
+    GAME_ID_PAGE_SIZE = 1000
+
+    def get_game_ids(self) -> list:
+        """Lists the chat IDs of every stored game, page by page."""
+        ids = []
+        while True:
+            response = (
+                self.supabase.table('games').select('id').order('id')
+                .range(len(ids), len(ids) + self.GAME_ID_PAGE_SIZE - 1).execute()
+            )
+            page = response.data or []
+            if not page:
+                return ids
+            ids.extend(row['id'] for row in page)
 
     def delete_game(self, chat_id: int):
         """Removes a game document after it has ended."""
         return self.supabase.table('games').delete().eq('id', chat_id).execute()
 
+    @staticmethod
+    def _idle_since(query, cutoff: str):
+        """Filters to games idle since `cutoff`; rows written before last_activity existed count as idle."""
+        return query.or_(f"last_activity.is.null,last_activity.lt.{cutoff}")
+
+    def claim_expired_games(self, idle_timeout: timedelta, limit: int = 100) -> list:
+        """
+        Removes up to `limit` games with no activity within `idle_timeout` and returns them.
+        Candidates come from an indexed range query on games.last_activity; the delete
+        repeats the idle condition, so a game touched in the meantime is left alone.
+        Each result keeps the raw row so a failed finalization can be put back.
+        """
+        cutoff = (datetime.now() - idle_timeout).isoformat()
+        candidates = (
+            self._idle_since(self.supabase.table('games').select('id'), cutoff)
+            .order('last_activity', nullsfirst=True)
+            .limit(limit)
+            .execute()
+        )
+        chat_ids = [row['id'] for row in candidates.data or []]
+        if not chat_ids:
+            return []
+        deleted = self._idle_since(self.supabase.table('games').delete().in_('id', chat_ids), cutoff).execute()
+        return [{'id': row['id'], 'game_data': load_game_row(row), 'row': row} for row in deleted.data or []]
+
+    def restore_game_row(self, row: dict):
+        """Puts back a claimed games row; fails if a new game was created in the chat meanwhile."""
+        return self.supabase.table('games').insert(row).execute()
+
     # --- Statistics Management ---
 
+    def get_group_stats(self, chat_id: int):
+        """Fetches the all-time statistics row for a group."""
+        response = self.supabase.table('groups').select('*').eq('id', chat_id).maybe_single().execute()
+        group = response.data if response else None
+        if group and isinstance(group.get('game_history'), str):
+            group['game_history'] = json.loads(group['game_history'])
+        return group
+
     def update_stats_on_game_end(self, chat_id: int, chat_title: str, game_data: dict, winner_name: str):
-        """Updates group and user statistics when a game ends."""
+        """Updates group and user statistics and the activity rollups when a game ends."""
+        now = datetime.now()
+        player_ids = game_data.get("players", [])
+        player_stats = game_data.get("player_stats", {})
+        game_truths = sum(player_stats.get(str(pid), {}).get('truths', 0) for pid in player_ids)
+        game_dares = sum(player_stats.get(str(pid), {}).get('dares', 0) for pid in player_ids)
+
         # --- 1. Update Group Info ---
-        group_response = self.supabase.table('groups').select('*').eq('id', chat_id).single().execute()
-        group = group_response.data or {}
+        # A group's first game has no row yet
+        group_response = self.supabase.table('groups').select('*').eq('id', chat_id).maybe_single().execute()
+        group = (group_response.data if group_response else None) or {}
 
         game_history = group.get('game_history', []) or []
+        if isinstance(game_history, str): # Stored as JSON text, see the upsert below
+            game_history = json.loads(game_history)
         game_history.append({
             "game_id": game_data["game_id"], "game_name": game_data["game_name"],
-            "start_time": game_data.get("start_time"), "end_time": datetime.now().isoformat(),
-            "players": len(game_data.get("players", [])), "winner": winner_name,
-            "scores": { str(pid): game_data["scores"].get(str(pid), 0) for pid in game_data["players"] }
+            "start_time": game_data.get("start_time"), "end_time": now.isoformat(),
+            "players": len(player_ids), "winner": winner_name,
+            "scores": { str(pid): game_data["scores"].get(str(pid), 0) for pid in player_ids }
         })
 
         highest_score_in_game = max(game_data["scores"].values()) if game_data["scores"] else 0
@@ -81,30 +156,39 @@ class Database:
             'id': chat_id,
             'title': chat_title,
             'total_games': group.get('total_games', 0) + 1,
+            'total_truths': group.get('total_truths', 0) + game_truths,
+            'total_dares': group.get('total_dares', 0) + game_dares,
             'highest_score': max(group.get('highest_score', 0), highest_score_in_game),
-            'all_players': list(set((group.get('all_players') or []) + [str(p) for p in game_data.get("players", [])])),
+            'all_players': list(set((group.get('all_players') or []) + [str(p) for p in player_ids])),
             'game_history': json.dumps(game_history[-10:]), # Keep last 10
-            'last_played': datetime.now().isoformat()
+            'last_played': now.isoformat()
         }).execute()
 
         # --- 2. Update Player Info ---
-        for player_id in game_data.get("players", []):
-            self.update_player_stats(player_id, chat_id, game_data)
+        if player_ids:
+            users_response = self.supabase.table('users').select('*').in_('id', player_ids).execute()
+            users = {user['id']: user for user in users_response.data or []}
+            self.supabase.table('users').upsert([
+                self._player_stats_row(users.get(player_id, {}), player_id, chat_id, game_data, now)
+                for player_id in player_ids
+            ]).execute()
 
-    def update_player_stats(self, user_id: int, chat_id: int, game_data: dict):
-        """Updates the global statistics for a single player."""
-        user_response = self.supabase.table('users').select('*').eq('id', user_id).single().execute()
-        user = user_response.data or {}
+        # --- 3. Update Activity Rollups ---
+        self.update_activity_rollups(chat_id, game_data, now)
 
+    def _player_stats_row(self, user: dict, user_id: int, chat_id: int, game_data: dict, now: datetime) -> dict:
+        """Builds the updated global statistics row for a single player."""
         player_id_str = str(user_id)
         player_score = game_data.get("scores", {}).get(player_id_str, 0)
         player_game_stats = game_data.get("player_stats", {}).get(player_id_str, {})
         
         groups_played = user.get('groups_played', []) or []
+        if isinstance(groups_played, str): # Stored as JSON text
+            groups_played = json.loads(groups_played)
         if chat_id not in groups_played:
             groups_played.append(chat_id)
 
-        self.supabase.table('users').upsert({
+        return {
             'id': user_id,
             'games_played': user.get('games_played', 0) + 1,
             'total_score': user.get('total_score', 0) + player_score,
@@ -114,15 +198,115 @@ class Database:
             'total_skips': user.get('total_skips', 0) + player_game_stats.get('skips', 0),
             'total_changes': user.get('total_changes', 0) + player_game_stats.get('changes', 0),
             'groups_played': json.dumps(groups_played),
-            'last_played': datetime.now().isoformat()
-        }).execute()
+            'last_played': now.isoformat()
+        }
+
+    # --- Activity Rollups ---
+
+    ROLLUP_COUNTERS = ('games', 'truths', 'dares', 'skips', 'changes', 'points')
+
+    @staticmethod
+    def rollup_buckets(when: datetime) -> list:
+        """Returns the (period, bucket) pairs a moment falls into, e.g. ('week', '2026-W42')."""
+        iso_year, iso_week, _ = when.isocalendar()
+        return [('day', when.strftime('%Y-%m-%d')), ('week', f"{iso_year}-W{iso_week:02d}")]
+
+    def update_activity_rollups(self, chat_id: int, game_data: dict, when: datetime):
+        """
+        Adds one finished game to the day and week buckets of the group and each player.
+        All touched buckets are read and written back in one request each.
+        """
+        deltas = {('group', chat_id): dict.fromkeys(self.ROLLUP_COUNTERS, 0)}
+        deltas[('group', chat_id)]['games'] = 1
+        for player_id in game_data.get("players", []):
+            stats = game_data.get("player_stats", {}).get(str(player_id), {})
+            player_delta = {
+                'games': 1,
+                'truths': stats.get('truths', 0),
+                'dares': stats.get('dares', 0),
+                'skips': stats.get('skips', 0),
+                'changes': stats.get('changes', 0),
+                'points': game_data.get("scores", {}).get(str(player_id), 0),
+            }
+            deltas[('user', player_id)] = player_delta
+            for counter in self.ROLLUP_COUNTERS[1:]:
+                deltas[('group', chat_id)][counter] += player_delta[counter]
+
+        rows = {}
+        for (scope, scope_id), delta in deltas.items():
+            for period, bucket in self.rollup_buckets(when):
+                row_id = f"{scope}:{scope_id}:{period}:{bucket}"
+                rows[row_id] = {'id': row_id, 'scope': scope, 'scope_id': scope_id, 'period': period, 'bucket': bucket, **delta}
+
+        existing = self.supabase.table('activity_rollups').select('*').in_('id', list(rows)).execute()
+        for current in existing.data or []:
+            row = rows[current['id']]
+            for counter in self.ROLLUP_COUNTERS:
+                row[counter] += current.get(counter, 0)
+
+        self.supabase.table('activity_rollups').upsert(list(rows.values())).execute()
+
+    # --- Question Feedback ---
+
+    FEEDBACK_PAGE_SIZE = 1000
+
+    def get_question_feedback(self) -> list:
+        """
+        Fetches the all-time served/completed/skipped/changed counters of every question.
+        Reads page by page, since PostgREST caps how many rows one request returns.
+        """
+        rows = []
+        while True:
+            response = (
+                self.supabase.table('question_feedback').select('*').order('id')
+                .range(len(rows), len(rows) + self.FEEDBACK_PAGE_SIZE - 1).execute()
+            )
+            page = response.data or []
+            if not page: # The server may cap pages below FEEDBACK_PAGE_SIZE, so only an empty one ends the scan
+                return rows
+            rows.extend(page)
+
+    def flush_question_feedback(self, deltas: dict):
+        """Adds a batch of per-question counter deltas, keyed by question key, in one upsert."""
+        rows = {key: {'id': key, **counts} for key, counts in deltas.items()}
+        existing = self.supabase.table('question_feedback').select('*').in_('id', list(rows)).execute()
+        for current in existing.data or []:
+            row = rows[current['id']]
+            for field in ('served', 'completed', 'skipped', 'changed'):
+                row[field] += current.get(field, 0)
+        self.supabase.table('question_feedback').upsert(list(rows.values())).execute()
+
+    # --- User Profiles ---
 
     async def update_user_info(self, user):
-        """Updates user information like username and first_name."""
-        self.supabase.table('users').upsert({
-            'id': user.id,
-            'username': user.username,
-            'first_name': user.first_name
-        }).execute()
+        """Queues a username/first_name update; unchanged profiles cost nothing."""
+        if self.profiles.add(user.id, user.username, user.first_name):
+            self.flush_user_info()
+
+    def flush_user_info(self):
+        """Writes every queued profile change in a single bulk upsert."""
+        pending = self.profiles.drain()
+        if not pending:
+            return
+        try:
+            self.supabase.table('users').upsert([
+                {'id': user_id, 'username': username, 'first_name': first_name}
+                for user_id, (username, first_name) in pending.items()
+            ]).execute()
+        except Exception as e:
+            logger.error(f"Failed to write {len(pending)} user profile(s), will retry: {e}")
+            self.profiles.restore(pending)
+            return
+        self.profiles.mark_written(pending)
+
+    def get_user_name(self, user_id: int):
+        """Looks up a user's stored name, preferring the username, without a Telegram API call."""
+        profile = self.profiles.lookup(user_id)
+        if profile is None:
+            response = self.supabase.table('users').select('username, first_name').eq('id', user_id).execute()
+            if not response.data:
+                return None
+            profile = (response.data[0].get('username'), response.data[0].get('first_name'))
+        return profile[0] or profile[1]
 
 db = Database()
@@ -0,0 +1,215 @@
+import sys
+import json
+import base64
+import struct
+import zlib
+from array import array
+from datetime import datetime
+
+# --- Binary Layout ---
+# A little-endian header followed by length-prefixed strings and packed arrays:
+#   magic "TD", format version, fixed fields, string lengths, array lengths,
+#   game_id / game_name / chat_title, players, player_queue, scores,
+#   truths / dares / skips / changes, used truth keys, used dare keys.
+# Version 2 added the turn nonce after dare_count.
+MAGIC = b"TD"
+FORMAT_VERSION = 2
+_HEADERS = {
+    1: struct.Struct("<2sBqqqBBIIIHHHHHII"),
+    2: struct.Struct("<2sBqqqBBIIIIHHHHHII"),
+}
+_HEADER = _HEADERS[FORMAT_VERSION]
+
+STATUSES = ("waiting", "playing")
+CHOICES = (None, "truth", "dare")
+START_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+STAT_FIELDS = ("truths", "dares", "skips", "changes")
+_SWAP_BYTES = sys.byteorder != "little"
+
+def question_key(question: str) -> int:
+    """A compact 32-bit key that stands in for a question's full text in used_questions."""
+    return zlib.crc32(question.encode("utf-8"))
+
+class GameState:
+    """
+    Typed, compact form of a game, used to store it in games.game_state.
+
+    Player IDs are ints and every per-player counter is an array aligned with
+    `players`. Handlers still work on the dict from `to_dict()`, so this shrinks
+    what is written and read per save, not the memory of a game being handled.
+    """
+    __slots__ = (
+        "chat_id", "game_id", "game_name", "admin_id", "chat_title", "status",
+        "current_player", "current_choice", "start_time", "truth_count", "dare_count", "turn",
+        "players", "player_queue", "scores", "truths", "dares", "skips", "changes",
+        "used_truths", "used_dares",
+    )
+
+    def __init__(self, chat_id: int, game_id: str, game_name: str, admin_id: int, chat_title: str = None,
+                 status: str = "waiting", current_player: int = None, current_choice: str = None,
+                 start_time: int = 0, truth_count: int = 0, dare_count: int = 0, turn: int = 0):
+        self.chat_id = chat_id
+        self.game_id = game_id
+        self.game_name = game_name
+        self.admin_id = admin_id
+        self.chat_title = chat_title
+        self.status = status
+        self.current_player = current_player
+        self.current_choice = current_choice
+        self.start_time = start_time
+        self.truth_count = truth_count
+        self.dare_count = dare_count
+        self.turn = turn
+        self.players = array("q")
+        self.player_queue = array("q")
+        self.scores = array("i")
+        self.truths = array("I")
+        self.dares = array("I")
+        self.skips = array("I")
+        self.changes = array("I")
+        self.used_truths = array("I")
+        self.used_dares = array("I")
+
+    def add_player(self, player_id: int) -> int:
+        """Adds a player with zeroed counters and returns their index."""
+        self.players.append(player_id)
+        for counters in (self.scores, self.truths, self.dares, self.skips, self.changes):
+            counters.append(0)
+        return len(self.players) - 1
+
+    # --- Conversion from/to the dict shape used by the handlers ---
+
+    @classmethod
+    def from_dict(cls, game_data: dict) -> "GameState":
+        """Builds a GameState from the legacy JSON game document."""
+        start_time = game_data.get("start_time")
+        state = cls(
+            chat_id=int(game_data.get("_id", 0)),
+            game_id=game_data.get("game_id", ""),
+            game_name=game_data.get("game_name", ""),
+            admin_id=int(game_data.get("admin_id") or 0),
+            chat_title=game_data.get("chat_title"),
+            status=game_data.get("status", "waiting"),
+            current_player=game_data.get("current_player"),
+            current_choice=game_data.get("current_choice"),
+            start_time=int(datetime.strptime(start_time, START_TIME_FORMAT).timestamp()) if start_time else 0,
+            truth_count=game_data.get("truth_count", 0),
+            dare_count=game_data.get("dare_count", 0),
+            turn=game_data.get("turn", 0),
+        )
+
+        scores = game_data.get("scores", {})
+        player_stats = game_data.get("player_stats", {})
+        for player_id in game_data.get("players", []):
+            index = state.add_player(int(player_id))
+            state.scores[index] = scores.get(str(player_id), 0)
+            stats = player_stats.get(str(player_id), {})
+            for field in STAT_FIELDS:
+                getattr(state, field)[index] = stats.get(field, 0)
+        state.player_queue.extend(int(pid) for pid in game_data.get("player_queue", []))
+
+        used = game_data.get("used_questions", {})
+        # Older documents stored the full question text; newer ones store keys.
+        state.used_truths.extend(q if isinstance(q, int) else question_key(q) for q in used.get("truth", []))
+        state.used_dares.extend(q if isinstance(q, int) else question_key(q) for q in used.get("dare", []))
+        return state
+
+    def to_dict(self) -> dict:
+        """Expands the state into the dict shape the bot handlers work with."""
+        player_ids = [str(pid) for pid in self.players]
+        return {
+            "_id": self.chat_id, "game_id": self.game_id, "game_name": self.game_name,
+            "admin_id": self.admin_id, "chat_title": self.chat_title,
+            "players": list(self.players),
+            "scores": dict(zip(player_ids, self.scores)),
+            "player_stats": {
+                pid: {field: getattr(self, field)[i] for field in STAT_FIELDS}
+                for i, pid in enumerate(player_ids)
+            },
+            "player_queue": list(self.player_queue),
+            "current_player": self.current_player, "current_choice": self.current_choice,
+            "used_questions": {"truth": list(self.used_truths), "dare": list(self.used_dares)},
+            "truth_count": self.truth_count, "dare_count": self.dare_count, "turn": self.turn,
+            "start_time": datetime.fromtimestamp(self.start_time).strftime(START_TIME_FORMAT) if self.start_time else None,
+            "status": self.status,
+        }
+
+    # --- Binary serialization ---
+
+    def encode(self) -> bytes:
+        game_id = self.game_id.encode("utf-8")
+        game_name = self.game_name.encode("utf-8")
+        chat_title = (self.chat_title or "").encode("utf-8")
+        header = _HEADER.pack(
+            MAGIC, FORMAT_VERSION, self.chat_id, self.admin_id, self.current_player or 0,
+            STATUSES.index(self.status), CHOICES.index(self.current_choice),
+            self.start_time, self.truth_count, self.dare_count, self.turn,
+            len(game_id), len(game_name), len(chat_title),
+            len(self.players), len(self.player_queue), len(self.used_truths), len(self.used_dares),
+        )
+        parts = [header, game_id, game_name, chat_title]
+        for values in (self.players, self.player_queue, self.scores, self.truths,
+                       self.dares, self.skips, self.changes, self.used_truths, self.used_dares):
+            if _SWAP_BYTES:
+                values = array(values.typecode, values)
+                values.byteswap()
+            parts.append(values.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, payload: bytes) -> "GameState":
+        magic, version = payload[:2], payload[2]
+        if magic != MAGIC:
+            raise ValueError("not an encoded game state")
+        if version not in _HEADERS:
+            raise ValueError(f"unsupported game state format version {version}")
+
+        header = _HEADERS[version]
+        fields = list(header.unpack_from(payload))
+        if version == 1:
+            fields.insert(10, 0) # No turn nonce yet
+        (_, _, chat_id, admin_id, current_player, status, choice, start_time,
+         truth_count, dare_count, turn, id_len, name_len, title_len,
+         n_players, n_queue, n_used_truths, n_used_dares) = fields
+
+        offset = header.size
+        strings = []
+        for length in (id_len, name_len, title_len):
+            strings.append(payload[offset:offset + length].decode("utf-8"))
+            offset += length
+
+        state = cls(
+            chat_id=chat_id, game_id=strings[0], game_name=strings[1], admin_id=admin_id,
+            chat_title=strings[2] or None, status=STATUSES[status],
+            current_player=current_player or None, current_choice=CHOICES[choice],
+            start_time=start_time, truth_count=truth_count, dare_count=dare_count, turn=turn,
+        )
+        for name, count in (("players", n_players), ("player_queue", n_queue), ("scores", n_players),
+                            ("truths", n_players), ("dares", n_players), ("skips", n_players),
+                            ("changes", n_players), ("used_truths", n_used_truths), ("used_dares", n_used_dares)):
+            values = getattr(state, name)
+            size = count * values.itemsize
+            values.frombytes(payload[offset:offset + size])
+            if _SWAP_BYTES:
+                values.byteswap()
+            offset += size
+        return state
+
+# --- games row helpers ---
+
+def dump_game_data(game_data: dict) -> str:
+    """Encodes a handler game dict for the text games.game_state column."""
+    return base64.b64encode(GameState.from_dict(game_data).encode()).decode("ascii")
+
+def load_game_row(row: dict):
+    """
+    Decodes a games row into the handlers' dict shape.
+    Rows written before the binary format only carry the JSON `game_data`
+    column; they are migrated on read and rewritten compactly on the next save.
+    """
+    if row.get("game_state"):
+        return GameState.decode(base64.b64decode(row["game_state"])).to_dict()
+    game_data = row.get("game_data")
+    if isinstance(game_data, str):
+        game_data = json.loads(game_data)
+    return GameState.from_dict(game_data).to_dict() if game_data else None
@@ -0,0 +1,77 @@
+import os
+import json
+import socket
+import asyncio
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# --- Channel Configuration ---
+# The bot and the stats API run as separate processes; live events travel
+# between them as small JSON datagrams on this address. Only one listener can
+# bind it, so the stats API runs as a single worker.
+LIVE_EVENTS_HOST = os.getenv("LIVE_EVENTS_HOST", "127.0.0.1")
+LIVE_EVENTS_PORT = int(os.getenv("LIVE_EVENTS_PORT", "8765"))
+
+class LiveEventHub:
+    """
+    Fans live game events out to every subscriber of a group within one process.
+    Also serves as the in-process stand-in for the socket channel in tests.
+    """
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, group_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers[group_id].add(queue)
+        return queue
+
+    def unsubscribe(self, group_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(group_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[group_id]
+
+    def publish(self, group_id: int, event: dict):
+        for queue in self._subscribers.get(group_id, ()):
+            # A slow viewer loses its oldest events rather than holding up everyone else.
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+class UdpEventPublisher:
+    """Fire-and-forget publisher used by the bot; a lost datagram only costs one live update."""
+    def __init__(self, host: str = LIVE_EVENTS_HOST, port: int = LIVE_EVENTS_PORT):
+        self.address = (host, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def publish(self, group_id: int, event: dict):
+        payload = json.dumps({"group_id": group_id, **event}).encode("utf-8")
+        try:
+            self._sock.sendto(payload, self.address)
+        except OSError as e:
+            logger.debug(f"Dropped live event for group {group_id}: {e}")
+
+class _HubProtocol(asyncio.DatagramProtocol):
+    def __init__(self, hub: LiveEventHub):
+        self.hub = hub
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            event = json.loads(data)
+            group_id = int(event.pop("group_id"))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed live event from {addr}: {e}")
+            return
+        self.hub.publish(group_id, event)
+
+async def listen_for_events(hub: LiveEventHub, host: str = LIVE_EVENTS_HOST, port: int = LIVE_EVENTS_PORT):
+    """Feeds datagrams from UdpEventPublisher into `hub`; returns the transport to close on shutdown."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _HubProtocol(hub), local_addr=(host, port))
+    return transport
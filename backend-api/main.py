@@ -1,10 +1,16 @@
 import os
-from fastapi import FastAPI, HTTPException
+import json
+import asyncio
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pymongo import MongoClient
+from supabase import create_client
 from dotenv import load_dotenv
 from typing import List, Dict, Any
 
+from live_events import LiveEventHub, listen_for_events
+
 # --- Load Environment Variables ---
 load_dotenv()
 
@@ -20,6 +26,24 @@ db = client[DB_NAME]
 groups_collection = db["groups"]
 users_collection = db["users"]
 
+# Activity rollups are written by the bot, which keeps its data in Supabase,
+# so they are served from there rather than from MongoDB.
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+if not SUPABASE_URL or not SUPABASE_KEY:
+    raise Exception("SUPABASE_URL or SUPABASE_KEY not found in environment variables.")
+
+supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+# --- Activity Rollup Settings ---
+ROLLUP_PERIODS = ("day", "week")
+MAX_ROLLUP_BUCKETS = 366
+
+# --- Live Event Settings ---
+SSE_HEARTBEAT_SECONDS = 15
+live_hub = LiveEventHub()
+
 # --- FastAPI App Initialization ---
 app = FastAPI()
 
@@ -32,6 +56,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def get_activity_buckets(scope: str, scope_id: int, period: str, limit: int) -> List[Dict[str, Any]]:
+    """Returns the newest `limit` pre-aggregated buckets for a group or user, oldest first."""
+    if period not in ROLLUP_PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {', '.join(ROLLUP_PERIODS)}")
+    limit = max(1, min(limit, MAX_ROLLUP_BUCKETS))
+    try:
+        response = (
+            supabase.table("activity_rollups")
+            .select("bucket, games, truths, dares, skips, changes, points")
+            .eq("scope", scope).eq("scope_id", scope_id).eq("period", period)
+            .order("bucket", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return list(reversed(response.data or []))
+    except Exception as e:
+        print(f"Error fetching {period} activity for {scope} {scope_id}: {e}")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+# Live events arrive on a single UDP port, so only one process can receive them:
+# run the stats API with one worker (e.g. `uvicorn main:app --workers 1`).
+# Any extra worker still serves the REST endpoints, but its live streams stay quiet.
+@app.on_event("startup")
+async def start_live_events():
+    try:
+        app.state.live_transport = await listen_for_events(live_hub)
+    except OSError as e:
+        app.state.live_transport = None
+        print(f"Live events disabled in this worker (pid {os.getpid()}); could not bind the event port: {e}")
+
+@app.on_event("shutdown")
+async def stop_live_events():
+    if app.state.live_transport is not None:
+        app.state.live_transport.close()
+
 # --- API Endpoint for Group Stats ---
 @app.get("/api/stats/{group_id}")
 async def get_group_stats(group_id: int):
@@ -119,3 +178,37 @@ async def get_user_stats(user_id: int):
     except Exception as e:
         print(f"Error fetching stats for user {user_id}: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+# --- API Endpoints for Activity Charts ---
+@app.get("/api/stats/{group_id}/activity")
+async def get_group_activity(group_id: int, period: str = "day", limit: int = 30):
+    return {"groupId": group_id, "period": period, "buckets": get_activity_buckets("group", group_id, period, limit)}
+
+@app.get("/api/user/{user_id}/activity")
+async def get_user_activity(user_id: int, period: str = "day", limit: int = 30):
+    return {"userId": user_id, "period": period, "buckets": get_activity_buckets("user", user_id, period, limit)}
+
+# --- API Endpoint for Live Game Events ---
+@app.get("/api/stats/{group_id}/live")
+async def stream_group_events(group_id: int, request: Request):
+    """Streams score and turn events for a group as Server-Sent Events."""
+    queue = live_hub.subscribe(group_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            live_hub.unsubscribe(group_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -22,6 +22,7 @@ Here are all the commands you can use to play the game and check stats\\.
 `• /startgame` \\- Starts the game after players have joined\\.
 `• /stop` \\- Ends the current game and shows final scores\\.
 `• /groupid` \\- Gets the unique ID for this group\\.
+`• /reloadquestions` \\- Reloads the truth and dare questions\\.
 
 *👤 Player Commands*
 `• /scores` \\- View the current scoreboard\\.
@@ -56,6 +57,15 @@ GROUP_STATS_MESSAGE = """
 *👥 Unique Players:* {unique_players}
 """
 
+GAME_EXPIRED_MESSAGE = "⏰ *This game was ended automatically after a long period of inactivity\\.*"
+
+GAME_EXPIRED_LOBBY_MESSAGE = "⏰ The game lobby was closed because nobody started it. Use /newgame to open a new one."
+
+TURNS_PAUSED_MESSAGE = (
+    "💤 Nobody has played for a full round, so turns are no longer skipped automatically\. "
+    "Press a button to carry on, or the game will end on its own after a while\."
+)
+
 
 # --- Dynamic Messages ---
 
@@ -96,6 +106,11 @@ NEXT_PLAYER_MESSAGES = [
     "🎯 Target locked on {player_name}\\! What's your choice?",
 ]
 
+TIMEOUT_MESSAGES = [
+    "⏰ Time's up\\! The turn has been skipped\\.",
+    "⌛ Too slow\\! Moving on to the next player\\.",
+]
+
 GAME_START_MESSAGES = [
     "🎪 The circus is open\\! Let the games begin\\!",
     "🎭 The show is starting\\! Good luck to all players\\!",
@@ -117,6 +132,9 @@ def get_dare_message(player_name):
 def get_skip_message(player_name):
     return f"{random.choice(SKIP_MESSAGES)}\n👤 {player_name}"
 
+def get_turn_timeout_message(player_name):
+    return f"{random.choice(TIMEOUT_MESSAGES)}\n👤 {player_name}"
+
 def get_success_message(player_name, points):
     return f"{random.choice(SUCCESS_MESSAGES)}\n👤 {player_name}\n💫 +{points} points\\!"
 
@@ -128,3 +146,38 @@ def get_game_start_message():
 
 def get_game_end_message():
     return random.choice(GAME_END_MESSAGES)
+
+
+# --- Formatting Helpers ---
+
+def escape_markdown_v2(text: str) -> str:
+    """Helper function to escape text for Telegram MarkdownV2."""
+    if not text: return ""
+    # We need to convert the input to string because numbers can be passed here
+    text = str(text)
+    escape_chars = r'_*[]()~`>#+-=|{}.!'
+    return ''.join(f'\\{char}' if char in escape_chars else char for char in text)
+
+RANK_EMOJIS = ("🥇", "🥈", "🥉")
+
+def format_scoreboard(ranked_players):
+    """Builds the /scores message from (name, score) pairs, highest score first."""
+    lines = [f"• {escape_markdown_v2(name)}: {escape_markdown_v2(score)} points\n" for name, score in ranked_players]
+    return "📊 *Current Scores*\n\n" + "".join(lines)
+
+def format_final_results(game_name, ranked_players):
+    """
+    Builds the end-of-game message from (player_id, name, score) tuples, highest
+    score first. A name of None marks a player whose name could not be fetched.
+    """
+    parts = [f"🏁 *Game Over\\!* 🏁\n\nThanks for playing *{escape_markdown_v2(game_name)}*\\!\n\n🏆 *Final Scoreboard* 🏆\n"]
+    if not ranked_players:
+        parts.append("No scores were recorded in this game\\.")
+    for i, (player_id, name, score) in enumerate(ranked_players):
+        if name is None:
+            parts.append(f"• Player_{player_id}: {escape_markdown_v2(score)} points \\(Could not fetch name\\)\n")
+        else:
+            emoji = RANK_EMOJIS[i] if i < len(RANK_EMOJIS) else "•"
+            parts.append(f"{emoji} {escape_markdown_v2(name)}: {escape_markdown_v2(score)} points\n")
+    parts.append(f"\nUse `/groupstats` to see all\\-time records\\!\n{get_game_end_message()}")
+    return "".join(parts)
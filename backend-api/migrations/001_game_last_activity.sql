@@ -0,0 +1,6 @@
+-- Idle-game expiry (user-026): every games write stamps last_activity, and the
+-- sweeper selects the oldest rows by it. Existing rows stay NULL; the sweeper
+-- treats NULL as idle, so no backfill is needed.
+alter table games add column if not exists last_activity timestamp;
+
+create index if not exists games_last_activity_idx on games (last_activity nulls first);
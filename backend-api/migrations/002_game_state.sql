@@ -0,0 +1,5 @@
+-- Binary game state (user-029): games are saved base64-encoded in game_state.
+-- game_data keeps legacy JSON rows readable until they are next saved, when it is cleared.
+alter table games add column if not exists game_state text;
+
+alter table games alter column game_data drop not null;
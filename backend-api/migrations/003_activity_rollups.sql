@@ -0,0 +1,22 @@
+-- Activity rollups (user-030): one row of counters per group or user, period and bucket.
+-- Row ids look like "group:-1001234567890:week:2026-W42".
+create table if not exists activity_rollups (
+    id text primary key,
+    scope text not null,
+    scope_id bigint not null,
+    period text not null,
+    bucket text not null,
+    games integer not null default 0,
+    truths integer not null default 0,
+    dares integer not null default 0,
+    skips integer not null default 0,
+    changes integer not null default 0,
+    points integer not null default 0
+);
+
+-- The activity endpoints read a contiguous, newest-first slice of one scope's buckets.
+create index if not exists activity_rollups_scope_idx
+    on activity_rollups (scope, scope_id, period, bucket desc);
+
+alter table groups add column if not exists total_truths integer not null default 0;
+alter table groups add column if not exists total_dares integer not null default 0;
@@ -0,0 +1,9 @@
+-- Question feedback (user-033): all-time counters per question, keyed by the
+-- CRC32 question key (game_state.question_key), which needs a bigint.
+create table if not exists question_feedback (
+    id bigint primary key,
+    served integer not null default 0,
+    completed integer not null default 0,
+    skipped integer not null default 0,
+    changed integer not null default 0
+);
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+class ProfileWriteBuffer:
+    """
+    Coalesces users-table profile writes.
+
+    Remembers the username/first_name last written for each user so unchanged
+    profiles are never rewritten, and holds the remaining changes until they can
+    go out together as one bulk upsert.
+    """
+    def __init__(self, max_pending: int = 200, max_known: int = 50000):
+        self.max_pending = max_pending
+        self.max_known = max_known
+        self._known = OrderedDict()  # user_id -> (username, first_name) as last written
+        self._pending = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, user_id: int, username: str, first_name: str) -> bool:
+        """Queues a profile if it changed; returns True once the batch is full enough to flush."""
+        profile = (username, first_name)
+        if self.lookup(user_id) == profile:
+            return False
+        self._pending[user_id] = profile
+        return len(self._pending) >= self.max_pending
+
+    def lookup(self, user_id: int):
+        """Returns the newest (username, first_name) known for a user, or None."""
+        return self._pending.get(user_id) or self._known.get(user_id)
+
+    def drain(self) -> dict:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def mark_written(self, profiles: dict):
+        for user_id, profile in profiles.items():
+            self._known[user_id] = profile
+            self._known.move_to_end(user_id)
+        while len(self._known) > self.max_known:
+            self._known.popitem(last=False)
+
+    def restore(self, profiles: dict):
+        """Re-queues profiles from a failed flush unless a newer change arrived meanwhile."""
+        for user_id, profile in profiles.items():
+            self._pending.setdefault(user_id, profile)
@@ -0,0 +1,93 @@
+import random
+from array import array
+from collections import defaultdict
+
+FEEDBACK_FIELDS = ("served", "completed", "skipped", "changed")
+_OUTCOME_INDEX = {"completed": 1, "skipped": 2, "changed": 3}
+
+# Unseen questions start at full weight; the prior keeps a couple of early skips
+# from burying a question, and MIN_WEIGHT keeps every question reachable.
+PRIOR_SERVED = 10
+MIN_WEIGHT = 0.1
+
+class AliasSampler:
+    """Draws indices proportionally to fixed weights in O(1) using Vose's alias method."""
+    def __init__(self, weights: list):
+        n = len(weights)
+        total = sum(weights)
+        if not n or total <= 0:
+            raise ValueError("weights must contain at least one positive value")
+        self.weights = array("d", weights)
+        self._prob = array("d", [0.0]) * n
+        self._alias = array("I", [0]) * n
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large: # Leftovers are 1.0 up to rounding error
+            self._prob[i] = 1.0
+
+    def __len__(self) -> int:
+        return len(self._prob)
+
+    def draw(self) -> int:
+        i = random.randrange(len(self._prob))
+        return i if random.random() < self._prob[i] else self._alias[i]
+
+class QuestionFeedback:
+    """
+    Aggregates per-question outcomes in memory.
+
+    Recording an event only bumps counters, so turns never wait on storage;
+    `drain()` hands the accumulated deltas to a periodic batch flush.
+    """
+    def __init__(self):
+        self._totals = {}  # question key -> [served, completed, skipped, changed]
+        self._pending = defaultdict(lambda: [0, 0, 0, 0])
+        self._in_play = {}  # chat_id -> key of the question currently shown
+
+    def load(self, rows: list):
+        """Seeds the all-time totals from stored rows."""
+        for row in rows:
+            self._totals[int(row["id"])] = [row.get(field, 0) for field in FEEDBACK_FIELDS]
+
+    def _record(self, key: int, index: int):
+        self._totals.setdefault(key, [0, 0, 0, 0])[index] += 1
+        self._pending[key][index] += 1
+
+    def served(self, chat_id: int, key: int):
+        self._in_play[chat_id] = key
+        self._record(key, 0)
+
+    def resolve(self, chat_id: int, outcome: str):
+        """Attributes a completed/skipped/changed outcome to the question in play."""
+        key = self._in_play.pop(chat_id, None)
+        if key is not None:
+            self._record(key, _OUTCOME_INDEX[outcome])
+
+    def forget(self, chat_id: int):
+        """Drops the question in play for a chat whose game ended without resolving it."""
+        self._in_play.pop(chat_id, None)
+
+    def weight(self, key: int) -> float:
+        served, _, skipped, changed = self._totals.get(key, (0, 0, 0, 0))
+        rejection_rate = (skipped + changed) / (served + PRIOR_SERVED)
+        return max(MIN_WEIGHT, 1.0 - rejection_rate)
+
+    def drain(self) -> dict:
+        """Returns and clears the deltas accumulated since the last flush."""
+        pending, self._pending = self._pending, defaultdict(lambda: [0, 0, 0, 0])
+        return {key: dict(zip(FEEDBACK_FIELDS, counts)) for key, counts in pending.items()}
+
+    def restore(self, deltas: dict):
+        """Puts back deltas from a failed flush so the next one retries them."""
+        for key, counts in deltas.items():
+            pending = self._pending[key]
+            for index, field in enumerate(FEEDBACK_FIELDS):
+                pending[index] += counts[field]
@@ -0,0 +1,163 @@
+import os
+import json
+import random
+import logging
+import weakref
+
+from game_state import question_key
+from question_feedback import AliasSampler
+
+logger = logging.getLogger(__name__)
+
+# Alias draws tried before falling back to filtering out used questions.
+SAMPLER_ATTEMPTS = 8
+
+# --- Game Logic Class ---
+class QuestionBank:
+    """An immutable, versioned snapshot of the truth and dare questions."""
+    __slots__ = ("version", "truths", "dares", "truth_keys", "dare_keys", "samplers", "__weakref__")
+
+    def __init__(self, version: int, truths: list, dares: list):
+        self.version = version
+        self.truths = tuple(truths)
+        self.dares = tuple(dares)
+        self.truth_keys = tuple(question_key(q) for q in self.truths)
+        self.dare_keys = tuple(question_key(q) for q in self.dares)
+        self.samplers = {}  # choice -> AliasSampler, swapped in whole by rebuild_samplers
+
+    def questions(self, choice: str) -> tuple:
+        return self.truths if choice == "truth" else self.dares
+
+    def keys(self, choice: str) -> tuple:
+        return self.truth_keys if choice == "truth" else self.dare_keys
+
+class TruthDareGame:
+    QUESTION_FILES = {"truth": 'data/truth.json', "dare": 'data/dare.json'}
+
+    def __init__(self):
+        self._mtimes = {}
+        # Games keep a strong reference to the snapshot they started with; once the
+        # last one is released, the snapshot drops out of _snapshots and is reclaimed.
+        self._game_banks = {}
+        self._snapshots = weakref.WeakValueDictionary()
+        self._weight_fn = None
+        self.bank = QuestionBank(
+            1,
+            self._load_questions(self.QUESTION_FILES["truth"]),
+            self._load_questions(self.QUESTION_FILES["dare"])
+        )
+        self._snapshots[self.bank.version] = self.bank
+
+    @property
+    def truths(self) -> tuple:
+        return self.bank.truths
+
+    @property
+    def dares(self) -> tuple:
+        return self.bank.dares
+
+    def _load_questions(self, file_path: str) -> list:
+        try:
+            return self._read_questions(file_path)
+        except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Error loading {file_path}: {e}")
+            return []
+
+    def _read_questions(self, file_path: str) -> list:
+        """Reads and validates a question file, raising if it is unusable."""
+        self._mtimes[file_path] = os.stat(file_path).st_mtime_ns
+        with open(file_path, 'r', encoding='utf-8') as f:
+            questions = json.load(f)
+        if not isinstance(questions, list) or not questions:
+            raise ValueError("expected a non-empty JSON list of questions")
+        if not all(isinstance(q, str) and q.strip() for q in questions):
+            raise ValueError("every question must be a non-empty string")
+        return questions
+
+    def files_changed(self) -> bool:
+        """Checks whether any question file was modified since it was last loaded."""
+        for file_path in self.QUESTION_FILES.values():
+            try:
+                if os.stat(file_path).st_mtime_ns != self._mtimes.get(file_path):
+                    return True
+            except FileNotFoundError:
+                continue
+        return False
+
+    def reload(self) -> QuestionBank:
+        """
+        Loads and validates a fresh bank, then swaps it in as the current snapshot.
+        Raises on invalid files, leaving the current bank untouched.
+        """
+        truths = self._read_questions(self.QUESTION_FILES["truth"])
+        dares = self._read_questions(self.QUESTION_FILES["dare"])
+        new_bank = QuestionBank(self.bank.version + 1, truths, dares)
+        if self._weight_fn:
+            self._build_samplers(new_bank)
+        self.bank = new_bank
+        self._snapshots[new_bank.version] = new_bank
+        logger.info(
+            f"Question bank v{new_bank.version} loaded ({len(truths)} truths, {len(dares)} dares); "
+            f"{len(self._snapshots)} snapshot(s) live"
+        )
+        return new_bank
+
+    def rebuild_samplers(self, weight_fn):
+        """Rebuilds the weighted samplers of every live snapshot from `weight_fn(question_key)`."""
+        self._weight_fn = weight_fn
+        for bank in list(self._snapshots.values()):
+            self._build_samplers(bank)
+
+    def _build_samplers(self, bank: QuestionBank):
+        samplers = {}
+        for choice in ("truth", "dare"):
+            keys = bank.keys(choice)
+            if keys:
+                samplers[choice] = AliasSampler([self._weight_fn(key) for key in keys])
+        bank.samplers = samplers
+
+    def acquire(self, chat_id: int) -> QuestionBank:
+        """Pins the current snapshot to a game for the rest of its lifetime."""
+        bank = self.bank
+        self._game_banks[chat_id] = bank
+        return bank
+
+    def bank_for(self, chat_id: int) -> QuestionBank:
+        """Returns the snapshot a game is pinned to, pinning the current one if needed."""
+        return self._game_banks.get(chat_id) or self.acquire(chat_id)
+
+    def release(self, chat_id: int):
+        self._game_banks.pop(chat_id, None)
+
+    def get_random_question(self, choice: str, used_questions: list, bank: QuestionBank = None) -> tuple[str, list]:
+        """
+        Picks an unused question; `used_questions` holds question keys, not texts.
+        Draws are weighted by feedback when a sampler is available: a few O(1)
+        alias draws usually find an unused question, with a filtered pass as fallback.
+        """
+        bank = bank or self.bank
+        question_list, keys = bank.questions(choice), bank.keys(choice)
+        sampler = bank.samplers.get(choice)
+        used_set = set(used_questions)
+
+        index = None
+        if sampler:
+            for _ in range(SAMPLER_ATTEMPTS):
+                candidate = sampler.draw()
+                if keys[candidate] not in used_set:
+                    index = candidate
+                    break
+
+        if index is None:
+            available = [i for i, key in enumerate(keys) if key not in used_set]
+            if not available:
+                logger.warning(f"All {choice} questions used. Resetting.")
+                used_questions = []
+                available = range(len(question_list))
+            if sampler:
+                index = random.choices(available, weights=[sampler.weights[i] for i in available])[0]
+            else:
+                index = random.choice(available)
+
+        used_questions.append(keys[index])
+        return question_list[index], used_questions
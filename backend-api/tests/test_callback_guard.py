@@ -0,0 +1,75 @@
+from callback_guard import CallbackGuard, make_callback_data, parse_callback_data
+
+def test_parse_round_trips_made_data():
+    assert parse_callback_data(make_callback_data("dare", "g1", 7)) == ("dare", "g1", 7)
+    assert parse_callback_data(make_callback_data("join_game", "g1")) == ("join_game", "g1", None)
+
+def test_parse_tolerates_legacy_and_malformed_data():
+    assert parse_callback_data("join_game") == ("join_game", None, None)
+    assert parse_callback_data("skip:g1:abc") == ("skip", "g1", None)
+    assert parse_callback_data("skip:g1:-1") == ("skip", "g1", None)
+
+def test_only_the_first_claim_of_a_turn_succeeds():
+    guard = CallbackGuard()
+    guard.set_turn(1, "g1", 3)
+    assert guard.claim(1, "g1", 3)
+    assert not guard.claim(1, "g1", 3)
+    assert guard.is_stale(1, "g1", 3)
+
+def test_claims_of_other_turns_and_games_are_rejected():
+    guard = CallbackGuard()
+    guard.set_turn(1, "g1", 3)
+    assert not guard.claim(1, "g1", 2)
+    assert not guard.claim(1, "g0", 3)
+    assert not guard.claim(1, "g1", None)
+    assert guard.claim(1, "g1", 3)
+
+def test_unknown_chats_are_claimable_so_handlers_check_the_database():
+    guard = CallbackGuard()
+    assert not guard.is_stale_game(1, "g1")
+    assert guard.claim(1, "g1", 3)
+
+def test_release_restores_a_failed_claim():
+    guard = CallbackGuard()
+    guard.set_turn(1, "g1", 3)
+    guard.claim(1, "g1", 3)
+    assert guard.release(1, "g1", 3)
+    assert guard.claim(1, "g1", 3)
+
+def test_release_keeps_a_newer_turn():
+    guard = CallbackGuard()
+    guard.set_turn(1, "g1", 3)
+    guard.claim(1, "g1", 3)
+    guard.set_turn(1, "g1", 4)
+    assert not guard.release(1, "g1", 3)
+    assert not guard.is_stale(1, "g1", 4)
+
+def test_seen_records_keys_and_evicts_the_least_recent():
+    guard = CallbackGuard(max_seen=2)
+    assert not guard.seen("a")
+    assert not guard.seen("b")
+    assert guard.seen("a") # Refreshes "a", so "b" is now the oldest
+    assert not guard.seen("c")
+    assert guard.was_seen("a") and guard.was_seen("c")
+    assert not guard.was_seen("b")
+
+def test_was_seen_does_not_record():
+    guard = CallbackGuard()
+    assert not guard.was_seen("join:1:g1:5")
+    assert not guard.seen("join:1:g1:5")
+
+def test_buttons_of_an_ended_game_are_stale():
+    guard = CallbackGuard()
+    guard.set_turn(1, "g1", 3)
+    guard.end_game(1, "g1")
+    assert guard.is_stale_game(1, "g1")
+    assert not guard.claim(1, "g1", 3)
+    assert not guard.release(1, "g1", 3)
+
+def test_a_new_game_replaces_the_tombstone():
+    guard = CallbackGuard()
+    guard.end_game(1, "g1")
+    guard.set_turn(1, "g2", 0)
+    assert not guard.is_stale_game(1, "g2")
+    assert guard.is_stale_game(1, "g1")
+    assert guard.claim(1, "g2", 0)
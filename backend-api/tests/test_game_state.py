@@ -0,0 +1,67 @@
+import json
+import base64
+
+import pytest
+
+from game_state import GameState, _HEADERS, question_key, load_game_row, dump_game_data
+
+LEGACY_GAME = {
+    "_id": -1001234567890, "game_id": "2610191200-123", "game_name": "Cosmic Quest #4321",
+    "admin_id": 111, "chat_title": "Friday Night Games",
+    "players": [111, 222],
+    "scores": {"111": 12, "222": -3},
+    "player_stats": {"111": {"truths": 3, "dares": 1, "skips": 0, "changes": 1},
+                     "222": {"truths": 0, "dares": 2, "skips": 1, "changes": 0}},
+    "player_queue": [222, 111], "current_player": 222, "current_choice": "dare",
+    "used_questions": {"truth": ["What is your biggest fear?"], "dare": ["Sing a song."]},
+    "truth_count": 3, "dare_count": 3, "turn": 7,
+    "start_time": "2026-10-19 12:00:00", "status": "playing",
+}
+
+def encode_v1(state: GameState) -> bytes:
+    """Re-packs a version-2 payload with the version-1 header, which had no turn nonce."""
+    payload = state.encode()
+    fields = list(_HEADERS[2].unpack_from(payload))
+    fields[1] = 1
+    del fields[10]
+    return _HEADERS[1].pack(*fields) + payload[_HEADERS[2].size:]
+
+def test_round_trip_preserves_the_handler_dict():
+    game = GameState.from_dict(LEGACY_GAME).to_dict()
+    assert GameState.decode(GameState.from_dict(game).encode()).to_dict() == game
+
+def test_legacy_question_text_is_migrated_to_crc_keys():
+    game = GameState.from_dict(LEGACY_GAME).to_dict()
+    assert game["used_questions"] == {
+        "truth": [question_key("What is your biggest fear?")],
+        "dare": [question_key("Sing a song.")],
+    }
+    # Keys survive a second pass unchanged
+    assert GameState.from_dict(game).to_dict()["used_questions"] == game["used_questions"]
+
+def test_version_1_payload_decodes_with_turn_zero():
+    state = GameState.from_dict(LEGACY_GAME)
+    decoded = GameState.decode(encode_v1(state)).to_dict()
+    assert decoded == {**state.to_dict(), "turn": 0}
+
+def test_decode_rejects_foreign_and_unknown_payloads():
+    payload = GameState.from_dict(LEGACY_GAME).encode()
+    with pytest.raises(ValueError):
+        GameState.decode(b"{}" + payload[2:])
+    with pytest.raises(ValueError):
+        GameState.decode(payload[:2] + bytes([99]) + payload[3:])
+
+def test_load_game_row_prefers_the_binary_column():
+    game = GameState.from_dict(LEGACY_GAME).to_dict()
+    row = {"game_state": dump_game_data(game), "game_data": {"stale": True}}
+    assert load_game_row(row) == game
+
+def test_load_game_row_migrates_legacy_json_rows():
+    expected = GameState.from_dict(LEGACY_GAME).to_dict()
+    assert load_game_row({"game_state": None, "game_data": LEGACY_GAME}) == expected
+    assert load_game_row({"game_data": json.dumps(LEGACY_GAME)}) == expected
+    assert load_game_row({"game_state": None, "game_data": None}) is None
+
+def test_dump_game_data_is_base64_of_the_encoding():
+    game = GameState.from_dict(LEGACY_GAME).to_dict()
+    assert base64.b64decode(dump_game_data(game)) == GameState.from_dict(game).encode()
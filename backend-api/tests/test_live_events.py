@@ -0,0 +1,57 @@
+import json
+import asyncio
+
+from live_events import LiveEventHub, _HubProtocol
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_publish_fans_out_to_every_subscriber_of_the_group_only():
+    async def scenario():
+        hub = LiveEventHub()
+        first, second, other = hub.subscribe(1), hub.subscribe(1), hub.subscribe(2)
+        hub.publish(1, {"type": "score"})
+        return first.get_nowait(), second.get_nowait(), other.empty()
+    first, second, other_empty = run(scenario())
+    assert first == second == {"type": "score"}
+    assert other_empty
+
+def test_full_queue_drops_its_oldest_event():
+    async def scenario():
+        hub = LiveEventHub(max_queue=2)
+        queue = hub.subscribe(1)
+        for i in range(3):
+            hub.publish(1, {"seq": i})
+        return [queue.get_nowait()["seq"] for _ in range(queue.qsize())]
+    assert run(scenario()) == [1, 2]
+
+def test_unsubscribe_removes_empty_groups():
+    async def scenario():
+        hub = LiveEventHub()
+        first, second = hub.subscribe(1), hub.subscribe(1)
+        hub.unsubscribe(1, first)
+        still_there = 1 in hub._subscribers
+        hub.unsubscribe(1, second)
+        hub.unsubscribe(1, second) # Repeated unsubscribes are harmless
+        return still_there, dict(hub._subscribers)
+    still_there, subscribers = run(scenario())
+    assert still_there
+    assert subscribers == {}
+
+def test_datagrams_are_published_to_their_group():
+    async def scenario():
+        hub = LiveEventHub()
+        queue = hub.subscribe(-100)
+        _HubProtocol(hub).datagram_received(json.dumps({"group_id": -100, "type": "turn"}).encode(), ("127.0.0.1", 1))
+        return queue.get_nowait()
+    assert run(scenario()) == {"type": "turn"}
+
+def test_malformed_datagrams_are_ignored():
+    async def scenario():
+        hub = LiveEventHub()
+        queue = hub.subscribe(1)
+        protocol = _HubProtocol(hub)
+        for data in (b"not json", b"[1]", b'{"type": "turn"}', b'{"group_id": "abc"}', b'{"group_id": null}'):
+            protocol.datagram_received(data, ("127.0.0.1", 1))
+        return queue.empty()
+    assert run(scenario())
@@ -0,0 +1,46 @@
+from profile_writes import ProfileWriteBuffer
+
+def test_unchanged_profile_is_skipped_once_written():
+    buffer = ProfileWriteBuffer()
+    buffer.add(1, "alex", "Alex")
+    buffer.mark_written(buffer.drain())
+
+    assert not buffer.add(1, "alex", "Alex")
+    assert len(buffer) == 0
+    buffer.add(1, "alex_99", "Alex")
+    assert buffer.drain() == {1: ("alex_99", "Alex")}
+
+def test_add_reports_a_full_batch():
+    buffer = ProfileWriteBuffer(max_pending=3)
+    assert not buffer.add(1, "a", "A")
+    assert not buffer.add(2, "b", "B")
+    assert not buffer.add(2, "b2", "B") # Coalesced with the pending change
+    assert buffer.add(3, "c", "C")
+
+def test_restore_keeps_a_newer_pending_change():
+    buffer = ProfileWriteBuffer()
+    buffer.add(1, "old", "Old")
+    buffer.add(2, "bo", "Bo")
+    failed = buffer.drain()
+    buffer.add(1, "new", "New")
+
+    buffer.restore(failed)
+    assert buffer.drain() == {1: ("new", "New"), 2: ("bo", "Bo")}
+
+def test_known_profiles_evict_least_recently_written():
+    buffer = ProfileWriteBuffer(max_known=2)
+    buffer.mark_written({1: ("a", "A"), 2: ("b", "B")})
+    buffer.mark_written({1: ("a", "A")}) # Rewriting 1 makes 2 the oldest
+    buffer.mark_written({3: ("c", "C")})
+
+    assert buffer.lookup(2) is None
+    assert buffer.lookup(1) == ("a", "A") and buffer.lookup(3) == ("c", "C")
+    buffer.add(2, "b", "B") # Forgotten, so it is written again
+    assert buffer.drain() == {2: ("b", "B")}
+
+def test_lookup_prefers_pending_over_known():
+    buffer = ProfileWriteBuffer()
+    buffer.mark_written({1: ("old", "Old")})
+    buffer.add(1, "new", "New")
+    assert buffer.lookup(1) == ("new", "New")
+    assert buffer.lookup(99) is None
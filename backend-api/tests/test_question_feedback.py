@@ -0,0 +1,50 @@
+import random
+from collections import Counter
+
+import pytest
+
+from question_feedback import AliasSampler, QuestionFeedback, MIN_WEIGHT
+
+def test_outcomes_are_attributed_to_the_question_in_play():
+    feedback = QuestionFeedback()
+    feedback.served(1, 42)
+    feedback.resolve(1, "skipped")
+    feedback.resolve(1, "completed") # Nothing in play any more
+    assert feedback.drain() == {42: {"served": 1, "completed": 0, "skipped": 1, "changed": 0}}
+
+def test_forget_drops_the_question_in_play():
+    feedback = QuestionFeedback()
+    feedback.served(1, 42)
+    feedback.forget(1)
+    feedback.resolve(1, "skipped")
+    assert feedback.drain()[42]["skipped"] == 0
+    assert not feedback._in_play
+
+def test_restore_requeues_a_failed_flush():
+    feedback = QuestionFeedback()
+    feedback.served(1, 42)
+    deltas = feedback.drain()
+    feedback.served(2, 42)
+    feedback.restore(deltas)
+    assert feedback.drain()[42]["served"] == 2
+
+def test_alias_draws_match_the_weights():
+    random.seed(1)
+    weights = [1, 2, 3, 4, 0]
+    sampler = AliasSampler(weights)
+    draws = 100_000
+    counts = Counter(sampler.draw() for _ in range(draws))
+    for index, weight in enumerate(weights):
+        assert counts[index] / draws == pytest.approx(weight / sum(weights), abs=0.01)
+    assert counts[4] == 0
+
+@pytest.mark.parametrize("weights", [[], [0, 0], [0.0]])
+def test_alias_sampler_rejects_unusable_weights(weights):
+    with pytest.raises(ValueError):
+        AliasSampler(weights)
+
+def test_weight_never_drops_below_the_floor():
+    feedback = QuestionFeedback()
+    feedback.load([{"id": 42, "served": 1000, "completed": 0, "skipped": 600, "changed": 400}])
+    assert feedback.weight(42) == MIN_WEIGHT
+    assert feedback.weight(7) == 1.0 # Unseen questions start at full weight
@@ -0,0 +1,84 @@
+import gc
+import json
+from collections import Counter
+
+import pytest
+
+import questions
+from questions import TruthDareGame, SAMPLER_ATTEMPTS
+
+@pytest.fixture
+def question_files(tmp_path, monkeypatch):
+    files = {"truth": tmp_path / "truth.json", "dare": tmp_path / "dare.json"}
+    files["truth"].write_text(json.dumps(["T1", "T2", "T3"]), encoding="utf-8")
+    files["dare"].write_text(json.dumps(["D1", "D2"]), encoding="utf-8")
+    monkeypatch.setattr(TruthDareGame, "QUESTION_FILES", {choice: str(path) for choice, path in files.items()})
+    return files
+
+# --- Snapshots ---
+
+def test_invalid_reload_raises_and_keeps_the_current_bank(question_files):
+    game = TruthDareGame()
+    bank = game.bank
+    question_files["truth"].write_text("[]", encoding="utf-8")
+    with pytest.raises(ValueError):
+        game.reload()
+    question_files["truth"].write_text(json.dumps(["T1"]), encoding="utf-8")
+    question_files["dare"].write_text("{not json", encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        game.reload()
+    assert game.bank is bank and game.bank.version == 1
+
+def test_pinned_game_keeps_drawing_from_its_snapshot(question_files):
+    game = TruthDareGame()
+    pinned = game.acquire(1)
+    question_files["truth"].write_text(json.dumps(["New truth"]), encoding="utf-8")
+    game.reload()
+
+    assert game.bank.version == 2
+    assert game.bank_for(1) is pinned
+    question, _ = game.get_random_question("truth", [], game.bank_for(1))
+    assert question in ("T1", "T2", "T3")
+    assert game.bank_for(2) is game.bank # New games get the reloaded bank
+
+def test_released_snapshot_is_reclaimed(question_files):
+    game = TruthDareGame()
+    game.acquire(1)
+    game.reload()
+    assert set(game._snapshots) == {1, 2}
+
+    game.release(1)
+    gc.collect()
+    assert set(game._snapshots) == {2}
+
+# --- Weighted draws ---
+
+def test_weighted_draws_follow_the_sampler(question_files):
+    game = TruthDareGame()
+    heavy = game.bank.truth_keys[0]
+    game.rebuild_samplers(lambda key: 10.0 if key == heavy else 0.1)
+    counts = Counter(game.get_random_question("truth", [])[0] for _ in range(5000))
+    assert counts["T1"] > 0.9 * 5000
+
+def test_falls_back_to_filtering_when_draws_hit_used_keys(question_files, monkeypatch):
+    game = TruthDareGame()
+    game.rebuild_samplers(lambda key: 1.0)
+    sampler = game.bank.samplers["truth"]
+    draws = []
+    monkeypatch.setattr(sampler, "draw", lambda: draws.append(0) or 0) # Always the used T1
+
+    used = [game.bank.truth_keys[0]]
+    question, used = game.get_random_question("truth", used)
+    assert len(draws) == SAMPLER_ATTEMPTS
+    assert question in ("T2", "T3")
+    assert used[-1] == questions.question_key(question)
+
+def test_resets_used_questions_once_all_are_used(question_files):
+    game = TruthDareGame()
+    for rebuild in (False, True):
+        if rebuild:
+            game.rebuild_samplers(lambda key: 1.0)
+        used = list(game.bank.dare_keys)
+        question, used = game.get_random_question("dare", used)
+        assert question in ("D1", "D2")
+        assert used == [questions.question_key(question)]
@@ -0,0 +1,52 @@
+from turn_timer import TurnTimer
+
+def test_pop_expired_returns_only_due_chats_in_deadline_order():
+    timer = TurnTimer(timeout=10)
+    timer.arm(1, timeout=5)
+    timer.arm(2, timeout=1)
+    timer.arm(3, timeout=30)
+
+    now = timer._heap[0][0] + 10 # past chats 2 and 1, before chat 3
+    assert timer.pop_expired(now) == [2, 1]
+    assert 3 in timer and len(timer) == 1
+
+def test_rearm_supersedes_the_earlier_deadline():
+    timer = TurnTimer(timeout=10)
+    timer.arm(1, timeout=1)
+    first_deadline = timer._heap[0][0]
+    timer.arm(1, timeout=100)
+
+    assert timer.pop_expired(first_deadline + 1) == []
+    assert 1 in timer
+    assert timer.pop_expired(first_deadline + 200) == [1]
+
+def test_cancel_drops_the_deadline():
+    timer = TurnTimer(timeout=10)
+    timer.arm(1, timeout=1)
+    timer.cancel(1)
+    timer.cancel(2) # Unknown chats are ignored
+
+    assert 1 not in timer
+    assert timer.pop_expired(timer._heap[0][0] + 1) == []
+
+def test_cancel_then_rearm_fires_once():
+    timer = TurnTimer(timeout=10)
+    timer.arm(1, timeout=1)
+    timer.cancel(1)
+    timer.arm(1, timeout=2)
+
+    assert timer.pop_expired(max(entry[0] for entry in timer._heap) + 1) == [1]
+    assert timer.pop_expired(float("inf")) == []
+
+def test_frequent_rearming_compacts_dead_entries():
+    timer = TurnTimer(timeout=10)
+    for chat_id in range(10):
+        timer.arm(chat_id)
+    for _ in range(50):
+        for chat_id in range(10):
+            timer.arm(chat_id)
+
+    assert len(timer) == 10
+    assert len(timer._heap) <= 2 * len(timer) + 64
+    assert sorted(timer.pop_expired(float("inf"))) == list(range(10))
+    assert timer._heap == []
@@ -2,7 +2,7 @@ import random
 import json
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from collections import deque
 from dotenv import load_dotenv
 from typing import Tuple
@@ -15,7 +15,13 @@ from telegram.error import BadRequest
 # Import local modules
 from database import db
 import messages
+from messages import escape_markdown_v2
 from decorators import is_admin, game_is_active
+from turn_timer import TurnTimer
+from questions import TruthDareGame
+from live_events import UdpEventPublisher
+from callback_guard import CallbackGuard, make_callback_data, parse_callback_data
+from question_feedback import QuestionFeedback
 
 # --- Logging Configuration ---
 logging.basicConfig(
@@ -25,46 +31,37 @@ logging.basicConfig(
 logging.getLogger('httpx').setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
-# --- Game Logic Class ---
-class TruthDareGame:
-    def __init__(self):
-        self.truths = self._load_questions('data/truth.json')
-        self.dares = self._load_questions('data/dare.json')
-
-    def _load_questions(self, file_path: str) -> list:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading {file_path}: {e}")
-            return []
-
-    def get_random_question(self, choice: str, used_questions: list) -> tuple[str, list]:
-        question_list = self.truths if choice == "truth" else self.dares
-        used_set = set(used_questions)
-        
-        available = [q for q in question_list if q not in used_set]
-        
-        if not available:
-            logger.warning(f"All {choice} questions used. Resetting.")
-            used_questions = []
-            available = question_list
-
-        question = random.choice(available)
-        used_questions.append(question)
-        return question, used_questions
+# --- Question Bank Configuration ---
+QUESTION_WATCH_INTERVAL = int(os.getenv("QUESTION_WATCH_INTERVAL_SECONDS", "30"))
+FEEDBACK_FLUSH_INTERVAL = 60
+SAMPLER_REBUILD_INTERVAL = 600
+
+# --- Turn Configuration ---
+TURN_POINTS = {"complete": 5, "skip": -6, "change_task": -2}
+TURN_OUTCOMES = {"complete": "completed", "skip": "skipped", "change_task": "changed"}
+TURN_TIMEOUT = int(os.getenv("TURN_TIMEOUT_SECONDS", "180"))
+TURN_TIMER_TICK = 5
+# Auto-skips stop after this many rounds in a row with no player action,
+# leaving the abandoned game to the expiry sweeper.
+MAX_IDLE_ROUNDS = 1
+
+# --- Profile Write Configuration ---
+PROFILE_FLUSH_INTERVAL = 10
+
+# --- Game Expiry Configuration ---
+# Lobbies and games with no activity for this long are finalized by the sweeper.
+GAME_IDLE_TIMEOUT = timedelta(minutes=int(os.getenv("GAME_IDLE_TIMEOUT_MINUTES", "60")))
+EXPIRY_SWEEP_INTERVAL = int(os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", "300"))
+EXPIRY_SWEEP_BATCH = 100
 
 game_logic = TruthDareGame()
+turn_timer = TurnTimer(TURN_TIMEOUT)
+live_events = UdpEventPublisher()
+callback_guard = CallbackGuard()
+question_feedback = QuestionFeedback()
+timeout_streaks = {}  # chat_id -> consecutive turns skipped by the timer
 
 # --- Utility Functions ---
-def escape_markdown_v2(text: str) -> str:
-    """Helper function to escape text for Telegram MarkdownV2."""
-    if not text: return ""
-    # We need to convert the input to string because numbers can be passed here
-    text = str(text)
-    escape_chars = r'_*[]()~`>#+-=|{}.!'
-    return ''.join(f'\\{char}' if char in escape_chars else char for char in text)
-
 async def get_player_name_and_mention(context: ContextTypes.DEFAULT_TYPE, chat_id: int, user_id: int) -> tuple[str, str]:
     """Gets a player's name (prioritizing username) and a markdown mention string."""
     name = None
@@ -75,9 +72,7 @@ async def get_player_name_and_mention(context: ContextTypes.DEFAULT_TYPE, chat_i
         name = member.user.username or member.user.first_name
     except Exception as e:
         logger.warning(f"Could not fetch user {user_id} via API: {e}. Falling back to DB.")
-        user_doc = db.users.find_one({"_id": user_id})
-        if user_doc:
-            name = user_doc.get("username") or user_doc.get("first_name")
+        name = db.get_user_name(user_id)
 
     if not name:
         name = f"Player_{user_id}"
@@ -106,15 +101,17 @@ async def new_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     game_data = {
         "_id": chat_id, "game_id": game_id, "game_name": game_name, "admin_id": user.id,
+        "chat_title": update.effective_chat.title,
         "players": [], "scores": {}, "player_stats": {}, "player_queue": [],
         "current_player": None, "current_choice": None,
-        "used_questions": {"truth": [], "dare": []},
+        "used_questions": {"truth": [], "dare": []}, "turn": 0,
         "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "status": "waiting"
     }
     db.create_game(chat_id, game_data)
+    callback_guard.set_turn(chat_id, game_id, 0)
     await db.update_user_info(user)
 
-    keyboard = [[InlineKeyboardButton("Join Game 🎮", callback_data="join_game")]]
+    keyboard = [[InlineKeyboardButton("Join Game 🎮", callback_data=make_callback_data("join_game", game_id))]]
     reply_markup = InlineKeyboardMarkup(keyboard)
     admin_name = user.username or user.first_name or "Admin"
     
@@ -137,17 +134,14 @@ async def start_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("The game has already started!")
         return
     random.shuffle(game_data["players"])
+    game_logic.acquire(chat_id)
     db.update_game(chat_id, {"status": "playing", "player_queue": game_data["players"]})
     await update.message.reply_text(messages.get_game_start_message(), parse_mode=ParseMode.MARKDOWN_V2)
+    live_events.publish(chat_id, {"type": "game_start", "game_id": game_data["game_id"], "game_name": game_data["game_name"]})
     await select_next_player(context, chat_id)
 
-@is_admin
-@game_is_active(True)
-async def stop_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    chat_title = update.effective_chat.title
-    game_data = db.get_game(chat_id)
-    
+async def build_final_results(context: ContextTypes.DEFAULT_TYPE, chat_id: int, chat_title: str, game_data: dict) -> str:
+    """Saves the end-of-game stats and returns the final scoreboard message."""
     if "game_id" not in game_data:
         game_data["game_id"] = f"legacy-{datetime.now().strftime('%y%m%d%H%M%S')}"
     if "game_name" not in game_data:
@@ -161,29 +155,40 @@ async def stop_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         winner_name = name
 
     db.update_stats_on_game_end(chat_id, chat_title, game_data, winner_name)
+    live_events.publish(chat_id, {
+        "type": "game_over", "game_id": game_data["game_id"],
+        "winner": winner_name, "scores": scores_dict
+    })
 
-    final_message = f"🏁 *Game Over\\!* 🏁\n\nThanks for playing *{escape_markdown_v2(game_data['game_name'])}*\\!\n\n🏆 *Final Scoreboard* 🏆\n"
-    if not scores_dict:
-        final_message += "No scores were recorded in this game\\."
-    else:
-        sorted_players = sorted(scores_dict.items(), key=lambda item: item[1], reverse=True)
-        for i, (player_id, score) in enumerate(sorted_players):
-            try:
-                name, _ = await get_player_name_and_mention(context, chat_id, int(player_id))
-                emoji = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else "•"
-                # --- FIX: Escape the score as well ---
-                final_message += f"{emoji} {escape_markdown_v2(name)}: {escape_markdown_v2(score)} points\n"
-            except Exception as e:
-                logger.error(f"Could not process score for player {player_id} in stop_game: {e}")
-                final_message += f"• Player_{player_id}: {escape_markdown_v2(score)} points \\(Could not fetch name\\)\n"
+    ranked_players = []
+    for player_id, score in sorted(scores_dict.items(), key=lambda item: item[1], reverse=True):
+        try:
+            name, _ = await get_player_name_and_mention(context, chat_id, int(player_id))
+        except Exception as e:
+            logger.error(f"Could not process score for player {player_id} in stop_game: {e}")
+            name = None
+        ranked_players.append((player_id, name, score))
+    return messages.format_final_results(game_data['game_name'], ranked_players)
 
-    final_message += f"\nUse `/groupstats` to see all\\-time records\\!\n{messages.get_game_end_message()}"
+@is_admin
+@game_is_active(True)
+async def stop_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    chat_title = update.effective_chat.title
+    game_data = db.get_game(chat_id)
+
+    final_message = await build_final_results(context, chat_id, chat_title, game_data)
     try:
         await update.message.reply_text(final_message, parse_mode=ParseMode.MARKDOWN_V2)
     except Exception as e:
         logger.error(f"Failed to send final scoreboard for chat {chat_id}: {e}")
         await update.message.reply_text("Game has been stopped. There was an issue displaying the final scores.")
     db.delete_game(chat_id)
+    game_logic.release(chat_id)
+    turn_timer.cancel(chat_id)
+    timeout_streaks.pop(chat_id, None)
+    callback_guard.end_game(chat_id, game_data["game_id"])
+    question_feedback.forget(chat_id)
     logger.info(f"Game stopped and stats saved for chat {chat_id}")
 
 @is_admin
@@ -202,16 +207,14 @@ async def group_id_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def scores_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     game_data = db.get_game(chat_id)
-    message = "📊 *Current Scores*\n\n"
     if not game_data.get("scores"):
         return await update.message.reply_text("No scores yet. The game has just started!")
         
-    sorted_players = sorted(game_data["scores"].items(), key=lambda item: item[1], reverse=True)
-
-    for player_id, score in sorted_players:
+    ranked_players = []
+    for player_id, score in sorted(game_data["scores"].items(), key=lambda item: item[1], reverse=True):
         name, _ = await get_player_name_and_mention(context, chat_id, int(player_id))
-        # --- FIX: Escape the score as well ---
-        message += f"• {escape_markdown_v2(name)}: {escape_markdown_v2(score)} points\n"
+        ranked_players.append((name, score))
+    message = messages.format_scoreboard(ranked_players)
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN_V2)
 
 @game_is_active(True)
@@ -274,12 +277,55 @@ async def my_id_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN_V2)
 
 # --- Callback Query Handlers ---
+def task_keyboard(game_id: str, turn: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("✅ Mark as Complete", callback_data=make_callback_data("complete", game_id, turn))],
+        [InlineKeyboardButton("⏭️ Skip", callback_data=make_callback_data("skip", game_id, turn)),
+         InlineKeyboardButton("🔄 Change", callback_data=make_callback_data("change_task", game_id, turn))]
+    ])
+
+def load_claimed_turn(chat_id: int, game_id: str, turn: int):
+    """Reads the game behind a claimed button, or returns None if the button turns out to be stale."""
+    game_data = db.get_game(chat_id)
+    if not game_data:
+        callback_guard.end_game(chat_id, game_id)
+        return None
+    if game_data.get("game_id") != game_id or game_data.get("turn", 0) != turn:
+        # The guard had no record of this chat (e.g. after a restart); learn the live turn.
+        callback_guard.set_turn(chat_id, game_data.get("game_id"), game_data.get("turn", 0))
+        return None
+    return game_data
+
+def restore_claimed_turn(chat_id: int, game_id: str, turn: int):
+    """
+    Puts back a turn whose handling failed after the claim, so its buttons and the turn timer work again.
+    Does nothing once apply_turn_outcome has saved the turn's result, since that moves the guard on.
+    """
+    if callback_guard.release(chat_id, game_id, turn):
+        turn_timer.arm(chat_id)
+
 async def join_game_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     chat_id = query.message.chat_id
     user = query.from_user
+    _, game_id, _ = parse_callback_data(query.data)
+    if callback_guard.seen(query.id):
+        return await query.answer()
+    if callback_guard.is_stale_game(chat_id, game_id):
+        await query.answer("This game has ended.", show_alert=True)
+        try: await query.edit_message_text("This game has ended or been cancelled.")
+        except BadRequest: pass
+        return
+    join_key = f"join:{chat_id}:{game_id}:{user.id}"
+    if callback_guard.was_seen(join_key):
+        return await query.answer("You're already in the game!", show_alert=True)
+
     game_data = db.get_game(chat_id)
-    if not game_data:
+    if not game_data or game_data.get("game_id") != game_id:
+        if game_data:
+            callback_guard.set_turn(chat_id, game_data.get("game_id"), game_data.get("turn", 0))
+        else:
+            callback_guard.end_game(chat_id, game_id)
         await query.answer("This game has ended.", show_alert=True)
         try: await query.edit_message_text("This game has ended or been cancelled.")
         except BadRequest: pass
@@ -288,16 +334,11 @@ async def join_game_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return await query.answer("You're already in the game!", show_alert=True)
     
     player_id_str = str(user.id)
-    db.games.update_one(
-        {"_id": chat_id},
-        {
-            "$push": {"players": user.id},
-            "$set": {
-                f"scores.{player_id_str}": 0,
-                f"player_stats.{player_id_str}": {"truths": 0, "dares": 0, "skips": 0, "changes": 0}
-            }
-        }
-    )
+    game_data["players"].append(user.id)
+    game_data["scores"][player_id_str] = 0
+    game_data["player_stats"][player_id_str] = {"truths": 0, "dares": 0, "skips": 0, "changes": 0}
+    db.create_game(chat_id, game_data)
+    callback_guard.seen(join_key)
     await db.update_user_info(user)
     await query.answer("You have joined the game!")
     
@@ -308,103 +349,166 @@ async def choice_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     chat_id = query.message.chat_id
     user_id = query.from_user.id
-    choice = query.data
-    game_data = db.get_game(chat_id)
-
-    if not game_data or user_id != game_data.get("current_player"):
-        return await query.answer("It's not your turn!", show_alert=True)
-
-    question, new_used = game_logic.get_random_question(choice, game_data["used_questions"][choice])
-    db.update_game(chat_id, {
-        f"used_questions.{choice}": new_used,
-        "current_choice": choice
-    })
+    choice, game_id, turn = parse_callback_data(query.data)
+    if callback_guard.seen(query.id):
+        return await query.answer()
+    if not callback_guard.claim(chat_id, game_id, turn):
+        return await query.answer("This button has expired.")
 
-    keyboard = [
-        [InlineKeyboardButton("✅ Mark as Complete", callback_data="complete")],
-        [InlineKeyboardButton("⏭️ Skip", callback_data="skip"), InlineKeyboardButton("🔄 Change", callback_data="change_task")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    player_name, _ = await get_player_name_and_mention(context, chat_id, user_id)
-    message_template = messages.get_truth_message if choice == "truth" else messages.get_dare_message
-    
-    await query.edit_message_text(
-        f"{message_template(escape_markdown_v2(player_name))}\n\n*{choice.upper()}:* {escape_markdown_v2(question)}",
-        reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN_V2
-    )
+    try:
+        game_data = load_claimed_turn(chat_id, game_id, turn)
+        if not game_data:
+            return await query.answer("This button has expired.")
+        if user_id != game_data.get("current_player"):
+            callback_guard.set_turn(chat_id, game_id, turn)
+            return await query.answer("It's not your turn!", show_alert=True)
+        timeout_streaks.pop(chat_id, None)
+
+        used_questions = game_data["used_questions"]
+        question, used_questions[choice] = game_logic.get_random_question(
+            choice, used_questions[choice], game_logic.bank_for(chat_id)
+        )
+        question_feedback.served(chat_id, used_questions[choice][-1])
+        db.update_game(chat_id, {
+            "used_questions": used_questions,
+            "current_choice": choice,
+            "turn": turn + 1
+        })
+        callback_guard.set_turn(chat_id, game_id, turn + 1)
+        turn_timer.arm(chat_id)
+
+        player_name, _ = await get_player_name_and_mention(context, chat_id, user_id)
+        message_template = messages.get_truth_message if choice == "truth" else messages.get_dare_message
+
+        await query.edit_message_text(
+            f"{message_template(escape_markdown_v2(player_name))}\n\n*{choice.upper()}:* {escape_markdown_v2(question)}",
+            reply_markup=task_keyboard(game_id, turn + 1), parse_mode=ParseMode.MARKDOWN_V2
+        )
+    except Exception:
+        restore_claimed_turn(chat_id, game_id, turn)
+        raise
 
 async def completion_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     chat_id = query.message.chat_id
-    action = query.data
-    game_data = db.get_game(chat_id)
-    if not game_data: return await query.answer("Game not found.", show_alert=True)
+    action, game_id, turn = parse_callback_data(query.data)
+    if callback_guard.seen(query.id):
+        return await query.answer()
+    if callback_guard.is_stale(chat_id, game_id, turn):
+        return await query.answer("This button has expired.")
 
     if action == "complete":
         member = await context.bot.get_chat_member(chat_id, query.from_user.id)
         if member.status not in ['administrator', 'creator']:
             return await query.answer("Only a group admin can mark tasks as complete!", show_alert=True)
-    elif query.from_user.id != game_data.get("current_player"):
-        return await query.answer("It's not your turn to do this!", show_alert=True)
+    if not callback_guard.claim(chat_id, game_id, turn):
+        return await query.answer("This button has expired.")
 
-    current_player_id = game_data["current_player"]
-    player_id_str = str(current_player_id)
-    player_name, _ = await get_player_name_and_mention(context, chat_id, current_player_id)
-    
-    updates = {}
-    completion_message = ""
+    try:
+        game_data = load_claimed_turn(chat_id, game_id, turn)
+        if not game_data:
+            return await query.answer("This button has expired.")
+        if action != "complete" and query.from_user.id != game_data.get("current_player"):
+            callback_guard.set_turn(chat_id, game_id, turn)
+            return await query.answer("It's not your turn to do this!", show_alert=True)
+        timeout_streaks.pop(chat_id, None)
+
+        current_player_id = game_data["current_player"]
+        player_name, _ = await get_player_name_and_mention(context, chat_id, current_player_id)
+
+        if action == "change_task":
+            choice = game_data["current_choice"]
+            question, game_data["used_questions"][choice] = game_logic.get_random_question(
+                choice, game_data["used_questions"][choice], game_logic.bank_for(chat_id)
+            )
+            apply_turn_outcome(chat_id, game_data, action, player_name)
+            question_feedback.served(chat_id, game_data["used_questions"][choice][-1])
+            await query.answer("Task changed! -2 points.", show_alert=True)
+            return await query.edit_message_text(
+                f"{messages.get_dare_message(escape_markdown_v2(player_name))}\n\n*{choice.upper()}:* {escape_markdown_v2(question)}",
+                reply_markup=task_keyboard(game_id, turn + 1), parse_mode=ParseMode.MARKDOWN_V2
+            )
+
+        if action == "complete":
+            completion_message = messages.get_success_message(escape_markdown_v2(player_name), TURN_POINTS["complete"])
+        else:
+            completion_message = messages.get_skip_message(escape_markdown_v2(player_name))
+
+        new_score = apply_turn_outcome(chat_id, game_data, action, player_name)
+        await query.edit_message_text(f"{completion_message}\nNew score: {escape_markdown_v2(new_score)}")
+        await announce_turn(context, chat_id, game_data)
+    except Exception:
+        restore_claimed_turn(chat_id, game_id, turn)
+        raise
+
+# --- Core Game Flow ---
+def advance_turn(game_data: dict) -> int:
+    """Hands the turn to the next player in the queue and returns the new turn number."""
+    player_queue = deque(game_data["player_queue"])
+    player_queue.rotate(-1)
+    game_data["player_queue"] = list(player_queue)
+    game_data["current_player"] = player_queue[0]
+    game_data["turn"] = game_data.get("turn", 0) + 1
+    return game_data["turn"]
+
+def apply_turn_outcome(chat_id: int, game_data: dict, action: str, player_name: str, touch: bool = True) -> int:
+    """
+    Applies the score and stat changes of a turn action, saves the game and returns the new score.
+    The same write moves the game on to its next turn (the next player's, unless the task was
+    only changed), so once a score is stored no button or timeout of the old turn can add it again.
+    """
+    player_id = game_data["current_player"]
+    player_id_str = str(player_id)
+    stats = game_data["player_stats"].setdefault(player_id_str, {"truths": 0, "dares": 0, "skips": 0, "changes": 0})
 
     if action == "complete":
         choice = game_data["current_choice"]
-        updates["$inc"] = {
-            f"scores.{player_id_str}": 5,
-            f"player_stats.{player_id_str}.{choice}s": 1,
-            f"{choice}_count": 1
-        }
-        completion_message = messages.get_success_message(escape_markdown_v2(player_name), 5)
-    
+        stats[f"{choice}s"] = stats.get(f"{choice}s", 0) + 1
+        game_data[f"{choice}_count"] = game_data.get(f"{choice}_count", 0) + 1
     elif action == "skip":
-        updates["$inc"] = {
-            f"scores.{player_id_str}": -6,
-            f"player_stats.{player_id_str}.skips": 1
-        }
-        completion_message = messages.get_skip_message(escape_markdown_v2(player_name))
-    
+        stats["skips"] = stats.get("skips", 0) + 1
     elif action == "change_task":
-        choice = game_data["current_choice"]
-        question, new_used = game_logic.get_random_question(choice, game_data["used_questions"][choice])
-        updates["$inc"] = {
-            f"scores.{player_id_str}": -2,
-            f"player_stats.{player_id_str}.changes": 1
-        }
-        updates["$set"] = {f"used_questions.{choice}": new_used}
-        
-        db.games.update_one({"_id": chat_id}, updates)
-        await query.answer("Task changed! -2 points.", show_alert=True)
-        keyboard = [[InlineKeyboardButton("✅ Mark as Complete", callback_data="complete")], [InlineKeyboardButton("⏭️ Skip", callback_data="skip"), InlineKeyboardButton("🔄 Change", callback_data="change_task")]]
-        return await query.edit_message_text(
-            f"{messages.get_dare_message(escape_markdown_v2(player_name))}\n\n*{choice.upper()}:* {escape_markdown_v2(question)}",
-            reply_markup=InlineKeyboardMarkup(keyboard), parse_mode=ParseMode.MARKDOWN_V2
-        )
+        stats["changes"] = stats.get("changes", 0) + 1
 
-    new_game_data = db.games.find_one_and_update({"_id": chat_id}, updates, return_document=True)
-    new_score = new_game_data["scores"][player_id_str]
-    await query.edit_message_text(f"{completion_message}\nNew score: {escape_markdown_v2(new_score)}")
-    await select_next_player(context, chat_id)
+    game_data["scores"][player_id_str] = game_data["scores"].get(player_id_str, 0) + TURN_POINTS[action]
+    if action == "change_task":
+        game_data["turn"] = game_data.get("turn", 0) + 1
+    else:
+        advance_turn(game_data)
+    db.create_game(chat_id, game_data, touch=touch)
+    callback_guard.set_turn(chat_id, game_data["game_id"], game_data["turn"])
+    turn_timer.arm(chat_id)
+
+    question_feedback.resolve(chat_id, TURN_OUTCOMES[action])
+    live_events.publish(chat_id, {
+        "type": "score", "game_id": game_data.get("game_id"),
+        "player_id": player_id, "player_name": player_name,
+        "action": action, "points": TURN_POINTS[action], "scores": game_data["scores"]
+    })
+    return game_data["scores"][player_id_str]
 
-# --- Core Game Flow ---
 async def select_next_player(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
     game_data = db.get_game(chat_id)
     if not game_data or game_data["status"] != "playing": return
 
-    player_queue = deque(game_data["player_queue"])
-    player_queue.rotate(-1)
-    next_player_id = player_queue[0]
-    
-    db.update_game(chat_id, {"current_player": next_player_id, "player_queue": list(player_queue)})
-    
+    advance_turn(game_data)
+    db.create_game(chat_id, game_data)
+    callback_guard.set_turn(chat_id, game_data["game_id"], game_data["turn"])
+    turn_timer.arm(chat_id)
+    await announce_turn(context, chat_id, game_data)
+
+async def announce_turn(context: ContextTypes.DEFAULT_TYPE, chat_id: int, game_data: dict):
+    """Posts the Truth/Dare buttons for the stored current turn."""
+    next_player_id, turn = game_data["current_player"], game_data["turn"]
     name, mention = await get_player_name_and_mention(context, chat_id, next_player_id)
-    keyboard = [[InlineKeyboardButton("🤔 Truth", callback_data="truth"), InlineKeyboardButton("😈 Dare", callback_data="dare")]]
+    live_events.publish(chat_id, {
+        "type": "turn", "game_id": game_data.get("game_id"),
+        "player_id": next_player_id, "player_name": name
+    })
+    keyboard = [[
+        InlineKeyboardButton("🤔 Truth", callback_data=make_callback_data("truth", game_data["game_id"], turn)),
+        InlineKeyboardButton("😈 Dare", callback_data=make_callback_data("dare", game_data["game_id"], turn))
+    ]]
     reply_markup = InlineKeyboardMarkup(keyboard)
     message = messages.get_next_player_message(player_name=mention)
     
@@ -415,6 +519,137 @@ async def select_next_player(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
         parse_mode=ParseMode.MARKDOWN_V2
     )
 
+@is_admin
+async def reload_questions_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Reloads the question files without restarting the bot."""
+    try:
+        bank = game_logic.reload()
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Question reload rejected: {e}")
+        return await update.message.reply_text(f"❌ Reload failed, keeping the current questions: {e}")
+    await update.message.reply_text(
+        f"✅ Loaded question bank v{bank.version} ({len(bank.truths)} truths, {len(bank.dares)} dares). "
+        "Games in progress keep their current questions."
+    )
+
+# --- Background Jobs ---
+async def watch_question_files(context: ContextTypes.DEFAULT_TYPE):
+    """Swaps in a new question bank whenever the question files change on disk."""
+    if not game_logic.files_changed():
+        return
+    try:
+        game_logic.reload()
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Ignoring invalid question files, keeping v{game_logic.bank.version}: {e}")
+
+async def flush_question_feedback(context: ContextTypes.DEFAULT_TYPE):
+    """Writes the feedback counters gathered since the last flush in one batch."""
+    deltas = question_feedback.drain()
+    if not deltas:
+        return
+    try:
+        db.flush_question_feedback(deltas)
+    except Exception as e:
+        logger.error(f"Failed to flush feedback for {len(deltas)} question(s), will retry: {e}")
+        question_feedback.restore(deltas)
+
+async def rebuild_question_samplers(context: ContextTypes.DEFAULT_TYPE):
+    """Re-weights question draws from the latest feedback."""
+    game_logic.rebuild_samplers(question_feedback.weight)
+
+async def flush_profile_writes(context: ContextTypes.DEFAULT_TYPE):
+    """Writes queued user-profile changes in one batch."""
+    db.flush_user_info()
+
+async def flush_on_shutdown(application: Application):
+    """Writes out buffered profile and feedback changes before the bot exits."""
+    db.flush_user_info()
+    await flush_question_feedback(None)
+
+async def sweep_expired_games(context: ContextTypes.DEFAULT_TYPE):
+    """Finalizes or discards games that have been idle longer than GAME_IDLE_TIMEOUT."""
+    # Rows are removed before anyone is notified, so /newgame works right away and a
+    # concurrent /stop finds no game to record a second time.
+    expired = db.claim_expired_games(GAME_IDLE_TIMEOUT, limit=EXPIRY_SWEEP_BATCH)
+    if not expired:
+        return
+
+    swept = 0
+    for claimed in expired:
+        chat_id, game_data = claimed["id"], claimed["game_data"]
+        # Lobbies that never started have nothing worth recording.
+        if not game_data or game_data.get("status") != "playing" or not game_data.get("scores"):
+            message, parse_mode = messages.GAME_EXPIRED_LOBBY_MESSAGE, None
+        else:
+            try:
+                chat_title = game_data.get("chat_title")
+                if not chat_title:
+                    chat_title = (await context.bot.get_chat(chat_id)).title
+                final_message = await build_final_results(context, chat_id, chat_title, game_data)
+            except Exception as e:
+                logger.error(f"Failed to finalize expired game in chat {chat_id}, restoring it for the next sweep: {e}")
+                try:
+                    db.restore_game_row(claimed["row"])
+                except Exception as restore_error:
+                    logger.error(f"Could not restore expired game in chat {chat_id}: {restore_error}")
+                continue
+            message, parse_mode = f"{messages.GAME_EXPIRED_MESSAGE}\n{final_message}", ParseMode.MARKDOWN_V2
+
+        swept += 1
+        game_logic.release(chat_id)
+        turn_timer.cancel(chat_id)
+        timeout_streaks.pop(chat_id, None)
+        if game_data:
+            callback_guard.end_game(chat_id, game_data.get("game_id"))
+        question_feedback.forget(chat_id)
+        try:
+            await context.bot.send_message(chat_id, text=message, parse_mode=parse_mode)
+        except Exception as e:
+            logger.warning(f"Could not notify chat {chat_id} about its expired game: {e}")
+
+    logger.info(f"Expiry sweep removed {swept} idle game(s)")
+
+async def expire_idle_turns(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Skips the current player in every game whose turn deadline has passed.
+    These saves do not count as activity, and once a full round has been skipped
+    in a row the timer stops, so an abandoned game still reaches the expiry sweeper.
+    """
+    for chat_id in turn_timer.pop_expired():
+        try:
+            game_data = db.get_game(chat_id)
+            if not game_data or game_data.get("status") != "playing" or game_data.get("current_player") is None:
+                continue
+            if timeout_streaks.get(chat_id, 0) >= MAX_IDLE_ROUNDS * len(game_data["players"]):
+                logger.info(f"No player action for a full round in chat {chat_id}; pausing auto-skips")
+                try:
+                    await context.bot.send_message(chat_id, text=messages.TURNS_PAUSED_MESSAGE, parse_mode=ParseMode.MARKDOWN_V2)
+                except Exception as e:
+                    logger.warning(f"Could not tell chat {chat_id} that auto-skips are paused: {e}")
+                continue
+            game_id, turn = game_data["game_id"], game_data.get("turn", 0)
+            if not callback_guard.claim(chat_id, game_id, turn):
+                # A button press for this turn is still being handled; look again after another timeout.
+                turn_timer.arm(chat_id)
+                continue
+        except Exception as e:
+            logger.error(f"Failed to load idle turn in chat {chat_id}: {e}")
+            turn_timer.arm(chat_id)
+            continue
+        try:
+            player_name, _ = await get_player_name_and_mention(context, chat_id, game_data["current_player"])
+            new_score = apply_turn_outcome(chat_id, game_data, "skip", player_name, touch=False)
+            timeout_streaks[chat_id] = timeout_streaks.get(chat_id, 0) + 1
+            await context.bot.send_message(
+                chat_id,
+                text=f"{messages.get_turn_timeout_message(escape_markdown_v2(player_name))}\nNew score: {escape_markdown_v2(new_score)}",
+                parse_mode=ParseMode.MARKDOWN_V2
+            )
+            await announce_turn(context, chat_id, game_data)
+        except Exception as e:
+            logger.error(f"Failed to auto-skip idle turn in chat {chat_id}: {e}")
+            restore_claimed_turn(chat_id, game_id, turn)
+
 # --- Main Application Setup ---
 def main():
     load_dotenv()
@@ -423,13 +658,14 @@ def main():
         logger.critical("TELEGRAM_TOKEN environment variable not set!")
         return
 
-    application = Application.builder().token(TOKEN).build()
+    application = Application.builder().token(TOKEN).post_shutdown(flush_on_shutdown).build()
     
     # Add handlers
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("myid", my_id_command))
     application.add_handler(CommandHandler("groupid", group_id_command))
+    application.add_handler(CommandHandler("reloadquestions", reload_questions_command))
     application.add_handler(CommandHandler("newgame", new_game_command))
     application.add_handler(CommandHandler("startgame", start_game_command))
     application.add_handler(CommandHandler("stop", stop_game_command))
@@ -437,11 +673,30 @@ def main():
     application.add_handler(CommandHandler("players", players_command))
     application.add_handler(CommandHandler("groupstats", group_stats_command))
 
-    application.add_handler(CallbackQueryHandler(join_game_callback, pattern="^join_game$"))
-    application.add_handler(CallbackQueryHandler(choice_callback, pattern="^(truth|dare)$"))
-    application.add_handler(CallbackQueryHandler(completion_callback, pattern="^(complete|skip|change_task)$"))
+    application.add_handler(CallbackQueryHandler(join_game_callback, pattern="^join_game(:|$)"))
+    application.add_handler(CallbackQueryHandler(choice_callback, pattern="^(truth|dare)(:|$)"))
+    application.add_handler(CallbackQueryHandler(completion_callback, pattern="^(complete|skip|change_task)(:|$)"))
     
     application.add_error_handler(error_handler)
+
+    try:
+        question_feedback.load(db.get_question_feedback())
+    except Exception as e:
+        logger.error(f"Could not load question feedback, starting with uniform weights: {e}")
+    game_logic.rebuild_samplers(question_feedback.weight)
+    # Turn deadlines only live in memory; give every stored game a fresh one.
+    # Lobbies and finished games are dropped when their deadline comes up.
+    try:
+        for chat_id in db.get_game_ids():
+            turn_timer.arm(chat_id)
+    except Exception as e:
+        logger.error(f"Could not re-arm turn timers for stored games: {e}")
+    application.job_queue.run_repeating(flush_profile_writes, interval=PROFILE_FLUSH_INTERVAL, first=PROFILE_FLUSH_INTERVAL)
+    application.job_queue.run_repeating(flush_question_feedback, interval=FEEDBACK_FLUSH_INTERVAL, first=FEEDBACK_FLUSH_INTERVAL)
+    application.job_queue.run_repeating(rebuild_question_samplers, interval=SAMPLER_REBUILD_INTERVAL, first=SAMPLER_REBUILD_INTERVAL)
+    application.job_queue.run_repeating(watch_question_files, interval=QUESTION_WATCH_INTERVAL, first=QUESTION_WATCH_INTERVAL)
+    application.job_queue.run_repeating(expire_idle_turns, interval=TURN_TIMER_TICK, first=TURN_TIMER_TICK)
+    application.job_queue.run_repeating(sweep_expired_games, interval=EXPIRY_SWEEP_INTERVAL, first=EXPIRY_SWEEP_INTERVAL)
     
     logger.info("Bot is starting...")
     application.run_polling()
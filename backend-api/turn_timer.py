@@ -0,0 +1,51 @@
+import heapq
+import itertools
+import time
+
+class TurnTimer:
+    """
+    Tracks one turn deadline per chat in a single min-heap.
+
+    Rearming pushes a fresh entry instead of searching the heap for the old one;
+    superseded entries are recognised by their sequence number and discarded when
+    they surface, so arm, cancel and expiry checks all stay O(log n) or better.
+    """
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._heap = []
+        self._live = {}  # chat_id -> sequence number of its current entry
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._live
+
+    def arm(self, chat_id: int, timeout: float = None):
+        """Starts or restarts the turn deadline for a chat."""
+        seq = next(self._seq)
+        self._live[chat_id] = seq
+        heapq.heappush(self._heap, (time.monotonic() + (timeout or self.timeout), seq, chat_id))
+        # Frequent rearming leaves dead entries behind; rebuild before they dominate the heap.
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._compact()
+
+    def cancel(self, chat_id: int):
+        """Drops a chat's deadline, e.g. when its game ends."""
+        self._live.pop(chat_id, None)
+
+    def pop_expired(self, now: float = None) -> list:
+        """Removes and returns every chat whose deadline has passed."""
+        now = time.monotonic() if now is None else now
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, chat_id = heapq.heappop(self._heap)
+            if self._live.get(chat_id) == seq:
+                del self._live[chat_id]
+                expired.append(chat_id)
+        return expired
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._live.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
@@ -1,7 +1,7 @@
 'use client';
 
-import { useState, FC, FormEvent, ReactNode } from 'react';
-import { Search, BarChart, Users, Gamepad2, Crown, Star, History, Swords, Shield, Bot, User, Hash, X, ClipboardList, Trophy, UserCog } from 'lucide-react';
+import { useState, useEffect, FC, FormEvent, ReactNode } from 'react';
+import { Search, BarChart, Users, Gamepad2, Crown, Star, History, Swords, Shield, Bot, User, Hash, X, ClipboardList, Trophy, UserCog, Radio } from 'lucide-react';
 
 // --- Type Definitions ---
 interface Player { name: string; username?: string; score: number; truths: number; dares: number; }
@@ -13,6 +13,8 @@ interface UserStatsData {
   stats: { games_played: number; total_score: number; highest_score: number; total_truths: number; total_dares: number; total_skips: number; };
   groups_played: { id: number; name: string }[];
 }
+interface LiveEvent { type: 'game_start' | 'turn' | 'score' | 'game_over'; player_id?: number; player_name?: string; scores?: Record<string, number>; winner?: string; }
+interface LiveGame { scores: Record<string, number>; names: Record<string, string>; currentPlayer?: string; finished: boolean; }
 type Page = 'home' | 'stats' | 'learn';
 
 
@@ -71,6 +73,26 @@ const UserStatsDisplay: FC<{ data: UserStatsData }> = ({ data }) => (
     </div>
 );
 
+const LiveScoreboard: FC<{ game: LiveGame }> = ({ game }) => {
+    const ranked = Object.entries(game.scores).sort(([, a], [, b]) => b - a);
+    return (
+        <div className="bg-gray-800/50 p-6 rounded-xl border border-white/10 mb-12">
+            <h3 className="text-xl font-semibold mb-4 flex items-center">
+                <Radio className={`mr-2 ${game.finished ? 'text-gray-500' : 'text-red-400 animate-pulse'}`}/> {game.finished ? 'Last Live Game' : 'Live Game'}
+            </h3>
+            {game.currentPlayer && !game.finished && <p className="text-sm text-gray-400 mb-3">Now playing: <span className="text-white font-semibold">{game.currentPlayer}</span></p>}
+            <div className="space-y-2">
+                {ranked.map(([playerId, score], index) => (
+                    <div key={playerId} className="flex justify-between p-3 bg-gray-800/60 rounded-lg text-sm">
+                        <span className="text-white">#{index + 1} {game.names[playerId] || `Player ${playerId}`}</span>
+                        <span className="flex items-center text-gray-300"><Star className="w-4 h-4 mr-1 text-yellow-400" />{score}</span>
+                    </div>
+                ))}
+            </div>
+        </div>
+    );
+};
+
 // --- Home Page Components ---
 const BOT_USERNAME = "YourBotUsername"; // <-- IMPORTANT: Change this to your bot's actual username
 
@@ -150,24 +172,48 @@ const StatsDashboard = () => {
   const [activeTab, setActiveTab] = useState<'group' | 'player'>('group');
   const [inputId, setInputId] = useState<string>('');
   const [groupStats, setGroupStats] = useState<GroupStats | null>(null);
+  const [liveGroupId, setLiveGroupId] = useState<string>('');
+  const [liveGame, setLiveGame] = useState<LiveGame | null>(null);
   const [userStats, setUserStats] = useState<UserStatsData | null>(null);
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const [error, setError] = useState<string>('');
 
-  const clearState = () => { setInputId(''); setGroupStats(null); setUserStats(null); setError(''); };
+  const clearState = () => { setInputId(''); setGroupStats(null); setUserStats(null); setError(''); setLiveGroupId(''); setLiveGame(null); };
+
+  // One SSE connection per viewer replaces re-fetching the full stats while a game is running.
+  useEffect(() => {
+    if (!liveGroupId) return;
+    const source = new EventSource(`http://localhost:8000/api/stats/${liveGroupId}/live`);
+    const handleEvent = (message: MessageEvent) => {
+      const event: LiveEvent = JSON.parse(message.data);
+      setLiveGame(prev => {
+        const game: LiveGame = event.type === 'game_start' || !prev
+          ? { scores: {}, names: {}, finished: false }
+          : { ...prev, names: { ...prev.names } };
+        if (event.player_id !== undefined && event.player_name) game.names[String(event.player_id)] = event.player_name;
+        if (event.scores) game.scores = event.scores;
+        if (event.type === 'turn' && event.player_name) game.currentPlayer = event.player_name;
+        if (event.type === 'game_over') game.finished = true;
+        return game;
+      });
+    };
+    ['game_start', 'turn', 'score', 'game_over'].forEach(type => source.addEventListener(type, handleEvent));
+    return () => source.close();
+  }, [liveGroupId]);
+
   const handleTabChange = (tab: 'group' | 'player') => { setActiveTab(tab); clearState(); };
 
   const handleFetchStats = async (e: FormEvent<HTMLFormElement>) => {
     e.preventDefault();
     if (!inputId) { setError(`Please enter a ${activeTab === 'group' ? 'Group' : 'Player'} ID.`); return; }
-    setError(''); setIsLoading(true); setGroupStats(null); setUserStats(null);
+    setError(''); setIsLoading(true); setGroupStats(null); setUserStats(null); setLiveGroupId(''); setLiveGame(null);
     const endpoint = activeTab === 'group' ? 'stats' : 'user';
     try {
       const apiUrl = `http://localhost:8000/api/${endpoint}/${inputId}`;
       const response = await fetch(apiUrl);
       if (!response.ok) throw new Error(`${activeTab === 'group' ? 'Group' : 'Player'} ID not found.`);
       const data = await response.json();
-      if (activeTab === 'group') setGroupStats(data);
+      if (activeTab === 'group') { setGroupStats(data); setLiveGroupId(inputId); }
       else setUserStats(data);
     } catch (err: unknown) {
         if (err instanceof Error) {
@@ -195,7 +241,7 @@ const StatsDashboard = () => {
           </div>
           {error && <p className="text-center text-red-400 mt-3 text-sm">{error}</p>}
         </form>
-        {groupStats && <div className="animate-fade-in"><h2 className="text-2xl font-bold mb-6 text-center text-gray-300">Displaying Stats for: <span className="text-indigo-400">{groupStats.groupName}</span></h2><div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-12"><StatCard icon={<Gamepad2 size={24}/>} label="Total Games Played" value={groupStats.totalGames} color="bg-indigo-500/80" /><StatCard icon={<Crown size={24}/>} label="Highest Score Ever" value={groupStats.highestScore} color="bg-yellow-500/80" /><StatCard icon={<Users size={24}/>} label="Unique Players" value={groupStats.uniquePlayers} color="bg-cyan-500/80" /></div><div className="grid grid-cols-1 lg:grid-cols-3 gap-8"><div className="lg:col-span-2"><h3 className="text-xl font-semibold mb-4 flex items-center"><BarChart className="mr-2"/> Leaderboard</h3><div className="space-y-2">{groupStats.topPlayers.map((player, index) => (<PlayerRow key={index} rank={index + 1} {...player} />))}</div></div><div><h3 className="text-xl font-semibold mb-4 flex items-center"><History className="mr-2"/> Recent Games</h3><div className="space-y-4">{groupStats.gameHistory.slice().reverse().map((game, index) => (<GameHistoryCard key={index} {...game} />))}</div></div></div></div>}
+        {groupStats && <div className="animate-fade-in"><h2 className="text-2xl font-bold mb-6 text-center text-gray-300">Displaying Stats for: <span className="text-indigo-400">{groupStats.groupName}</span></h2><div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-12"><StatCard icon={<Gamepad2 size={24}/>} label="Total Games Played" value={groupStats.totalGames} color="bg-indigo-500/80" /><StatCard icon={<Crown size={24}/>} label="Highest Score Ever" value={groupStats.highestScore} color="bg-yellow-500/80" /><StatCard icon={<Users size={24}/>} label="Unique Players" value={groupStats.uniquePlayers} color="bg-cyan-500/80" /></div>{liveGame && <LiveScoreboard game={liveGame} />}<div className="grid grid-cols-1 lg:grid-cols-3 gap-8"><div className="lg:col-span-2"><h3 className="text-xl font-semibold mb-4 flex items-center"><BarChart className="mr-2"/> Leaderboard</h3><div className="space-y-2">{groupStats.topPlayers.map((player, index) => (<PlayerRow key={index} rank={index + 1} {...player} />))}</div></div><div><h3 className="text-xl font-semibold mb-4 flex items-center"><History className="mr-2"/> Recent Games</h3><div className="space-y-4">{groupStats.gameHistory.slice().reverse().map((game, index) => (<GameHistoryCard key={index} {...game} />))}</div></div></div></div>}
         {userStats && <UserStatsDisplay data={userStats} />}
     </div>
   );